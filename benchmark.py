@@ -0,0 +1,120 @@
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from bisect import bisect_left, bisect_right
+import movie_sketch as sk
+import movie_storage as ms
+
+
+def generate_catalog(movie_count, rounded=True, seed=42):
+    """
+    Returns a synthetic movies dictionary with IMDb-like ratings (0-10)
+    and release years. Rounded ratings have one decimal like real ones;
+    unrounded ratings are all distinct, so ties can't hide rank errors.
+    """
+    generator = random.Random(seed)
+    movies = {}
+    for index in range(movie_count):
+        rating = min(10, max(0, generator.gauss(6.3, 1.4)))
+        if rounded:
+            rating = round(rating, 1)
+        movies[f"Movie {index}"] = {
+            "rating": rating,
+            "year": generator.randint(1890, 2025)
+        }
+
+    return movies
+
+
+def rank_error(sorted_values, value, fraction):
+    """
+    Returns how far the rank of `value` is from the wanted fraction,
+    counting any position among equal values as correct.
+    """
+    low = bisect_left(sorted_values, value) / len(sorted_values)
+    high = bisect_right(sorted_values, value) / len(sorted_values)
+    if low <= fraction <= high:
+        return 0
+    return min(abs(low - fraction), abs(high - fraction))
+
+
+def exact_stats():
+    """
+    Computes the exact median and distinct years the way
+    main.get_movie_stats does: full load, then sort.
+    """
+    movies = ms.get_movies()
+    sorted_ratings = sorted(movie_info["rating"] for movie_info in movies.values())
+    distinct_years = len({movie_info["year"] for movie_info in movies.values()})
+    return sorted_ratings, statistics.median(sorted_ratings), distinct_years
+
+
+def measure(function, *args):
+    """
+    Runs a function once for its time and once under tracemalloc
+    for its peak memory. Returns the result, seconds and peak bytes.
+    """
+    start_time = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - start_time
+
+    tracemalloc.start()
+    function(*args)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return result, seconds, peak_memory
+
+
+def benchmark_stats(movie_count, error, rounded=True):
+    """
+    Compares exact stats with the approximate streaming stats on a
+    synthetic catalog with rounded or unrounded ratings. Prints timings,
+    peak memory and accuracy and returns True if every approximate
+    value is within the error bound.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        ms.MOVIE_DB_FILE = os.path.join(directory, "movie_database.json")
+        ms.save_movies(generate_catalog(movie_count, rounded))
+
+        exact, exact_seconds, exact_memory = measure(exact_stats)
+        approximate, approximate_seconds, approximate_memory = measure(sk.approximate_movie_stats, error)
+
+    sorted_ratings, exact_median, exact_years = exact
+
+    print(f"{movie_count} movies, {'rounded' if rounded else 'unrounded'} ratings, error bound {error}")
+    print(f"Exact:       {exact_seconds:.2f}s, peak {exact_memory / 2 ** 20:.1f} MiB, "
+          f"median {exact_median}, {exact_years} distinct years")
+    print(f"Approximate: {approximate_seconds:.2f}s, peak {approximate_memory / 2 ** 20:.1f} MiB, "
+          f"median {approximate['median_rating']}, {approximate['distinct_years']} distinct years")
+
+    # The rank bound holds with high probability; allow for the sketch's tail.
+    passed = True
+    for fraction, value in approximate["percentiles"].items():
+        fraction_error = rank_error(sorted_ratings, value, fraction)
+        within_bound = fraction_error <= 2 * error
+        passed = passed and within_bound
+        result = "ok" if within_bound else "FAIL"
+        print(f"  p{int(fraction * 100):<3} {value:<5.2f} rank error {fraction_error:.4f} {result}")
+
+    # HyperLogLog has a standard error of `error`; allow three of them.
+    years_error = abs(approximate["distinct_years"] - exact_years) / exact_years
+    within_bound = years_error <= 3 * error
+    passed = passed and within_bound
+    result = "ok" if within_bound else "FAIL"
+    print(f"  distinct years relative error {years_error:.4f} {result}")
+
+    return passed
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    error_bound = float(sys.argv[2]) if len(sys.argv) > 2 else sk.DEFAULT_ERROR
+    # Rounded ratings are realistic, but every rank inside a run of equal
+    # ratings counts as correct; unrounded ratings check the bound itself.
+    results = [benchmark_stats(count, error_bound, rounded) for rounded in (True, False)]
+    sys.exit(0 if all(results) else 1)
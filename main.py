@@ -1,8 +1,14 @@
-import random
+import csv
 import statistics
 import matplotlib.pyplot as plt
 from fuzzywuzzy import process
 import movie_storage as ms
+import movie_import as mi
+import movie_export as me
+import movie_query as mq
+import movie_cache as mc
+import movie_sketch as sk
+import movie_sampling as msa
 
 
 # ANSI escape codes for colors
@@ -30,6 +36,10 @@ Menu:
 9.  Movies Sorted by year
 10. Movies filtered by rating and year
 11. Create rating Histogram
+12. Import movies from CSV/TSV
+13. Export movies to CSV/JSONL/columnar file
+14. Query movies
+15. Approximate stats (large catalogs)
 """
     blue_menu_text = f"{BLUE}{menu_text}{RESET}"
     print(blue_menu_text)
@@ -53,12 +63,16 @@ def user_menu_input():
         "8": sort_movies_rating_desc,
         "9": sort_movies_year_desc,
         "10": filter_movies,
-        "11": plot_rating_histogram
+        "11": plot_rating_histogram,
+        "12": import_movies,
+        "13": export_movies,
+        "14": query_movies,
+        "15": get_approximate_movie_stats
     }
 
     while True:
         print_menu()
-        user_input = input(f"{GREEN}Enter choice (0-11): {RESET}").strip()
+        user_input = input(f"{GREEN}Enter choice (0-15): {RESET}").strip()
         # Ignore empty input
         if not user_input:
             continue
@@ -98,7 +112,7 @@ def add_movie():
     This function prompts the user to add a new movie
     and its rating to the dictionary 'movies'.
     """
-    movies = ms.get_movies()
+    movies, titles = ms.get_catalog()
 
     while True:
         new_title = input(f"{GREEN}Enter new movie name: {RESET}").title().strip()
@@ -109,8 +123,9 @@ def add_movie():
             continue
 
         if movies:
-            if new_title in movies:
-                print(f"{RED}Movie {new_title} already exists! Try again.{RESET}")
+            existing_title = titles.find_title(new_title)
+            if existing_title is not None:
+                print(f"{RED}Movie {existing_title} already exists! Try again.{RESET}")
                 continue
 
         # Default initialization
@@ -159,7 +174,7 @@ def delete_movie():
     This function prompts the user to enter a movie name to delete,
     checks if the title exists in the 'movies' dictionary and deletes it.
     """
-    movies = ms.get_movies()
+    movies, titles = ms.get_catalog()
 
     if not movies:
         print(f"{RED}No movies found in database.{RESET}")
@@ -172,10 +187,11 @@ def delete_movie():
             print(f"{RED}Invalid input! Title cannot be empty.{RESET}")
             continue
 
-        # Check if movie exists.
-        if user_input in movies:
-            ms.delete_movie(user_input)
-            print(f"Movie {user_input} successfully deleted")
+        # Check if movie exists, ignoring case, accents and spacing.
+        movie_to_delete = titles.find_title(user_input)
+        if movie_to_delete is not None:
+            ms.delete_movie(movie_to_delete)
+            print(f"Movie {movie_to_delete} successfully deleted")
             break
 
         print(f"{RED}Movie {user_input} doesn't exist!{RESET}")
@@ -187,21 +203,22 @@ def update_movie():
     checks if the movie exists in the 'movies' dictionary,
     and allows the user to update its rating.
     """
-    movies = ms.get_movies()
+    movies, titles = ms.get_catalog()
 
     if not movies:
         print(f"{RED}No movies found in database.{RESET}")
         return
 
     while True:
-        movie_to_update = input(f"{GREEN}Enter movie name: {RESET}").title()
+        user_input = input(f"{GREEN}Enter movie name: {RESET}").title()
 
-        if not movie_to_update.strip():
+        if not user_input.strip():
             print(f"{RED}Invalid input! Title cannot be empty.{RESET}")
             continue
 
-        if movie_to_update not in movies:
-            print(f"{RED}Movie {movie_to_update} doesn't exist!{RESET}")
+        movie_to_update = titles.find_title(user_input)
+        if movie_to_update is None:
+            print(f"{RED}Movie {user_input} doesn't exist!{RESET}")
             continue
 
         while True:
@@ -227,27 +244,24 @@ def update_movie():
         break
 
 
-def get_movie_stats():
+def compute_movie_stats():
     """
-    This function takes the 'movies' dictionary and
-    prints the average and median rating as well as the
-    best and the worst rated movie.
+    This function takes the 'movies' dictionary and returns a dictionary
+    with the average and median rating as well as the best and the worst
+    rated movies. Returns None if there are no movies.
     """
     movies = ms.get_movies()
 
     if not movies:
-        print(f"{RED}No movies found in database.{RESET}")
-        return
+        return None
 
     sorted_ratings = sorted(movie_info["rating"] for movie_info in movies.values())
 
     # Average rating
     average_rating = sum(sorted_ratings) / len(sorted_ratings)
-    print(f"Average rating: {round(average_rating, 2)}")
 
     # Median rating using statistics.median
     median_rating = statistics.median(sorted_ratings)
-    print(f"Median rating: {median_rating}")
 
     # ratings_count = len(sorted_ratings)
     # mid_index = ratings_count // 2
@@ -256,64 +270,121 @@ def get_movie_stats():
     #     median_rating = (sorted_ratings[mid_index - 1] + sorted_ratings[mid_index]) / 2
     # else:
     #     median_rating = sorted_ratings[mid_index]
-    #
-    # print(f"Median rating: {median_rating}")
 
-    best_rating = max(movie_info["rating"] for movie_info in movies.values())
+    best_rating = sorted_ratings[-1]
     best_movies = [
         movie_title
         for movie_title, movie_info in movies.items()
         if movie_info["rating"] == best_rating
     ]
 
-    if len(best_movies) == 1:
-        print(f"Highest rated movie: {best_movies[0]}, {best_rating}")
-    else:
-        print(f"Highest rated movies: {', '.join(best_movies)}, {best_rating}")
-
-    worst_rating = min(movie_info["rating"] for movie_info in movies.values())
+    worst_rating = sorted_ratings[0]
     worst_movies = [
         movie_title
         for movie_title, movie_info in movies.items()
         if movie_info["rating"] == worst_rating
     ]
 
+    return {
+        "average_rating": average_rating,
+        "median_rating": median_rating,
+        "best_rating": best_rating,
+        "best_movies": best_movies,
+        "worst_rating": worst_rating,
+        "worst_movies": worst_movies
+    }
+
+
+def get_movie_stats():
+    """
+    This function prints the average and median rating as well as the
+    best and the worst rated movie. The stats are cached until the
+    catalog changes.
+    """
+    stats = mc.cached_result("stats", (), compute_movie_stats)
+
+    if stats is None:
+        print(f"{RED}No movies found in database.{RESET}")
+        return
+
+    print(f"Average rating: {round(stats['average_rating'], 2)}")
+    print(f"Median rating: {stats['median_rating']}")
+
+    best_movies = stats["best_movies"]
+    best_rating = stats["best_rating"]
+    if len(best_movies) == 1:
+        print(f"Highest rated movie: {best_movies[0]}, {best_rating}")
+    else:
+        print(f"Highest rated movies: {', '.join(best_movies)}, {best_rating}")
+
+    worst_movies = stats["worst_movies"]
+    worst_rating = stats["worst_rating"]
     if len(worst_movies) == 1:
         print(f"Lowest rated movie: {worst_movies[0]}, {worst_rating}")
     else:
         print(f"Lowest rated movies: {', '.join(worst_movies)}, {worst_rating}")
 
 
+def get_approximate_movie_stats():
+    """
+    This function prints approximate stats computed in one streaming
+    pass with bounded memory, for catalogs too large for the exact Stats.
+    """
+    stats = mc.cached_result("approximate_stats", sk.DEFAULT_ERROR, sk.approximate_movie_stats)
+
+    if stats is None:
+        print(f"{RED}No movies found in database.{RESET}")
+        return
+
+    print(f"Movies: {stats['count']}")
+    print(f"Average rating: {round(stats['average_rating'], 2)}")
+    print(f"Median rating: ~{stats['median_rating']}")
+    for fraction, rating in stats["percentiles"].items():
+        print(f"{int(fraction * 100)}th percentile: ~{rating}")
+    print(f"Distinct years: ~{stats['distinct_years']}")
+
+    best_movies = ", ".join(stats["best_movies"])
+    if stats["best_count"] > len(stats["best_movies"]):
+        best_movies += f" and {stats['best_count'] - len(stats['best_movies'])} more"
+    print(f"Highest rated: {best_movies}, {stats['best_rating']}")
+
+    worst_movies = ", ".join(stats["worst_movies"])
+    if stats["worst_count"] > len(stats["worst_movies"]):
+        worst_movies += f" and {stats['worst_count'] - len(stats['worst_movies'])} more"
+    print(f"Lowest rated: {worst_movies}, {stats['worst_rating']}")
+
+
 def get_random_movie():
     """
-    This function uses the random module to get a random movie
-    from the 'movies' dictionary as a suggestion to watch.
+    This function picks a random movie from the database as a
+    suggestion to watch. The movie is drawn by ID from the catalog if
+    it is already loaded, otherwise the database is streamed once.
     """
-    movies = ms.get_movies()
+    random_selection = msa.random_movie()
 
-    if not movies:
+    if random_selection is None:
         print(f"{RED}No movies found in database.{RESET}")
         return
 
-    convert_database_to_tuple = list(movies.items())
-    random_selection = random.choice(convert_database_to_tuple)
-    print(f"Your movie for tonight: {random_selection[0]}, it's rated {random_selection[1]['rating']}.")
+    movie_title, _, movie_rating = random_selection
+    print(f"Your movie for tonight: {movie_title}, it's rated {movie_rating}.")
 
 
 def search_movie():
     """
     This function prompts the user to enter part of the movie
     name and searches for it in the 'movies' dictionary using
-    fuzzymatch module for fuzzy string matching.
+    fuzzymatch module for fuzzy string matching. The query is
+    matched against the precomputed search keys of the titles.
     """
-    movies = ms.get_movies()
+    movies, titles = ms.get_catalog()
 
     if not movies:
         print(f"{RED}No movies found in database.{RESET}")
         return
 
     while True:
-        search_input = input(f"{GREEN}Enter part of the movie name: {RESET}").casefold()
+        search_input = ms.title_search_key(input(f"{GREEN}Enter part of the movie name: {RESET}"))
 
         # check for empty string
         if not search_input.strip():
@@ -323,10 +394,15 @@ def search_movie():
         break
 
     # Fuzzymatch module: use process.extract() to get best matches.
-    best_matches = process.extract(search_input, movies.keys(), limit=5)
+    # Each distinct search key is scored once; titles sharing it follow.
+    best_matches = process.extract(search_input, titles.ids_by_key.keys(), limit=5)
 
     # Manually filter matches based on score threshold.
-    filtered_matches = [(movie, score) for movie, score in best_matches if score >= 70]
+    filtered_matches = [
+        (titles.titles[title_id], score)
+        for search_key, score in best_matches if score >= 70
+        for title_id in titles.ids_by_key[search_key]
+    ][:5]
 
     if filtered_matches:
         for movie, score in filtered_matches:
@@ -343,14 +419,15 @@ def sort_movies_rating_desc():
     and movie rating, and then sorts the list of movies
     by movie rating in descending order.
     """
-    movies = ms.get_movies()
+    sorted_movie_list = mc.cached_result(
+        "sort_rating_desc", (),
+        lambda: sorted(ms.get_movies().items(), key=lambda item: item[1]["rating"], reverse=True)
+    )
 
-    if movies is None:
+    if not sorted_movie_list:
         print(f"{RED}No movies found in database.{RESET}")
         return
 
-    sorted_movie_list = sorted(movies.items(), key=lambda item: item[1]["rating"], reverse=True)
-
     for movie in sorted_movie_list:
         print(f"{movie[0]}: {movie[1]['rating']}")
 
@@ -362,29 +439,24 @@ def sort_movies_year_desc():
     and movie year, and then sorts the list of movies
     by year in descending order.
     """
-    movies = ms.get_movies()
+    sorted_movie_list = mc.cached_result(
+        "sort_year_desc", (),
+        lambda: sorted(ms.get_movies().items(), key=lambda item: item[1]["year"], reverse=True)
+    )
 
-    if not movies:
+    if not sorted_movie_list:
         print(f"{RED}No movies found in database.{RESET}")
         return
 
-    sorted_movie_list = sorted(movies.items(), key=lambda item: item[1]["year"], reverse=True)
-
     for movie in sorted_movie_list:
         print(f"{movie[0]}: {movie[1]['year']}")
 
 
-def filter_movies():
+def prompt_movie_filters():
     """
-    This function allows users to filter a list of movies
-    based on minimum rating, start year, and end year.
+    This function prompts the user for a minimum rating, start year,
+    and end year. Each can be left blank, in which case it is None.
     """
-    movies = ms.get_movies()
-
-    if not movies:
-        print(f"{RED}No movies found in database.{RESET}")
-        return
-
     while True:
         rating_input = input(f"{GREEN}Enter minimum rating (leave blank for no minimum rating): {RESET}").strip()
 
@@ -430,6 +502,17 @@ def filter_movies():
         else:
             print(f"{RED}Invalid end year! Please enter a valid year.{RESET}")
 
+    return minimum_rating, start_year, end_year
+
+
+def find_filtered_movies(minimum_rating, start_year, end_year):
+    """
+    This function returns the movies matching the minimum rating,
+    start year, and end year (each can be None) as a list of
+    (title, year, rating) tuples, sorted by rating, then year.
+    """
+    movies = ms.get_movies()
+
     filtered_movies = []
     for movie, movie_info in movies.items():
         year = movie_info.get("year")
@@ -446,10 +529,25 @@ def filter_movies():
 
         filtered_movies.append((movie, year, rating))
 
-    if filtered_movies:
-        # Sort by rating (asc), then by year (asc) if ratings are equal.
-        sorted_movies = sorted(filtered_movies, key=lambda item: (item[2], item[1]))
+    # Sort by rating (asc), then by year (asc) if ratings are equal.
+    return sorted(filtered_movies, key=lambda item: (item[2], item[1]))
+
+
+def filter_movies():
+    """
+    This function allows users to filter a list of movies
+    based on minimum rating, start year, and end year.
+    """
+    movie_count = mc.cached_result("movie_count", (), lambda: len(ms.get_movies()))
+
+    if not movie_count:
+        print(f"{RED}No movies found in database.{RESET}")
+        return
+
+    filters = prompt_movie_filters()
+    sorted_movies = mc.cached_result("filter", filters, lambda: find_filtered_movies(*filters))
 
+    if sorted_movies:
         # Display results.
         print("\nFiltered Movies:")
         for movie, year, rating in sorted_movies:
@@ -459,6 +557,36 @@ def filter_movies():
         print("\nNo movies found with given filters.")
 
 
+def query_movies():
+    """
+    This function prompts the user for a query expression, e.g.
+    rating>=8 year:1990..2000 title~"godfather" order by year desc limit 10
+    and prints the matching movies.
+    """
+    while True:
+        expression = input(f"{GREEN}Enter query: {RESET}").strip()
+
+        if not expression:
+            print(f"{RED}Invalid input! Query cannot be empty.{RESET}")
+            continue
+
+        try:
+            results = mc.cached_result("query", expression, lambda: mq.run_query(expression))
+
+        except ValueError as error:
+            print(f"{RED}Invalid query! {error}{RESET}")
+            continue
+
+        break
+
+    if results:
+        for movie, year, rating in results:
+            print(f"{movie} ({year}): {rating}")
+
+    else:
+        print("\nNo movies found for this query.")
+
+
 def plot_rating_histogram():
     """
     Create a histogram of movie ratings.
@@ -494,6 +622,83 @@ def plot_rating_histogram():
     plt.show()
 
 
+def import_movies():
+    """
+    This function prompts the user for a CSV or TSV file
+    and imports its movies (title, year, rating) into the database.
+    """
+    while True:
+        file_path = input(f"{GREEN}Enter path of CSV/TSV file: {RESET}").strip()
+
+        if not file_path:
+            print(f"{RED}Invalid input! Path cannot be empty.{RESET}")
+            continue
+
+        try:
+            summary = mi.import_movies(file_path)
+
+        except FileNotFoundError:
+            print(f"{RED}File {file_path} not found.{RESET}")
+            continue
+
+        except OSError as error:
+            print(f"{RED}Cannot read {file_path}: {error.strerror}{RESET}")
+            continue
+
+        # csv.Error: e.g. a quoted field larger than the csv field size limit.
+        except (ValueError, csv.Error) as error:
+            print(f"{RED}Cannot import {file_path}: {error}{RESET}")
+            continue
+
+        break
+
+    mi.print_summary(summary)
+
+
+def export_movies():
+    """
+    This function prompts the user for optional filters, a sort order
+    and an output file, and exports the matching movies.
+    The format is chosen by the file extension (.csv, .jsonl, .mcol).
+    """
+    minimum_rating, start_year, end_year = prompt_movie_filters()
+
+    while True:
+        sort_input = input(f"{GREEN}Sort by rating or year (leave blank for no sorting): {RESET}").strip().lower()
+
+        if sort_input == "":
+            sort_by = None
+            break
+
+        if sort_input in me.SORT_ORDERS:
+            sort_by = sort_input
+            break
+
+        print(f"{RED}Invalid sort order! Enter rating or year.{RESET}")
+
+    while True:
+        file_path = input(f"{GREEN}Enter output file (.csv, .jsonl or .mcol): {RESET}").strip()
+
+        if not file_path:
+            print(f"{RED}Invalid input! Path cannot be empty.{RESET}")
+            continue
+
+        if not file_path.lower().endswith(tuple(me.EXPORT_FORMATS)):
+            print(f"{RED}Invalid file type! Use .csv, .jsonl or .mcol.{RESET}")
+            continue
+
+        try:
+            written = me.export_movies(file_path, None, minimum_rating, start_year, end_year, sort_by)
+
+        except OSError as error:
+            print(f"{RED}Cannot write {file_path}: {error.strerror}{RESET}")
+            continue
+
+        break
+
+    print(f"{written} movies exported to {file_path}")
+
+
 # def create_rating_bar():
 #     """
 #     This function takes the 'movies' dictionary and
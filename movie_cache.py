@@ -0,0 +1,61 @@
+from collections import OrderedDict
+import movie_storage as ms
+
+
+# Maximum number of cached results before the least recently used is dropped.
+CACHE_SIZE = 128
+
+# (operation, params) -> (catalog version, result), oldest first.
+_results = OrderedDict()
+_counters = {"hits": 0, "misses": 0}
+
+
+def cached_result(operation, params, compute):
+    """
+    Returns the cached result of an operation with the given params,
+    or calls compute() and caches what it returns.
+
+    Every entry is tagged with the catalog version it was computed for,
+    so a result is only reused while the catalog hasn't changed.
+    params must be hashable (e.g. a tuple).
+    """
+    key = (operation, params)
+    version = ms.get_catalog_version()
+    entry = _results.get(key)
+
+    if entry is not None and entry[0] == version:
+        _counters["hits"] += 1
+        _results.move_to_end(key)
+        return entry[1]
+
+    _counters["misses"] += 1
+    result = compute()
+    _results[key] = (version, result)
+    _results.move_to_end(key)
+
+    if len(_results) > CACHE_SIZE:
+        _results.popitem(last=False)
+
+    return result
+
+
+def cache_info():
+    """
+    Returns a dictionary with the hit and miss counters
+    and the current and maximum size of the cache.
+    """
+    return {
+        "hits": _counters["hits"],
+        "misses": _counters["misses"],
+        "size": len(_results),
+        "max_size": CACHE_SIZE
+    }
+
+
+def clear_cache():
+    """
+    Removes all cached results and resets the counters.
+    """
+    _results.clear()
+    _counters["hits"] = 0
+    _counters["misses"] = 0
@@ -0,0 +1,344 @@
+import argparse
+import csv
+import heapq
+import json
+import os
+import struct
+import sys
+import tempfile
+from array import array
+import movie_storage as ms
+
+
+# Columnar file layout (all numbers little-endian):
+#   MAGIC
+#   row groups, each with `count` rows:
+#       years          int32   * count
+#       ratings        float64 * count
+#       title offsets  uint32  * (count + 1)   byte offsets into the title data
+#       title data     utf-8
+#   footer: (group offset uint64, row count uint32) per row group
+#   trailer: footer offset uint64, row group count uint32, MAGIC
+MAGIC = b"MCOL"
+ROW_GROUP_SIZE = 8192
+FOOTER_ENTRY = struct.Struct("<QI")
+TRAILER = struct.Struct("<QI4s")
+
+EXPORT_FORMATS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".mcol": "columnar"
+}
+
+SORT_ORDERS = ("rating", "year")
+
+# Most rows sorted in memory at once. Larger exports are sorted in runs
+# of this size, which are spilled to temporary files and merged.
+SORT_RUN_SIZE = 100000
+
+
+def iter_movie_rows():
+    """
+    Streams (title, year, rating) tuples from the movie database.
+    """
+    for title, movie_info in ms.iter_movies():
+        yield title, movie_info.get("year"), movie_info.get("rating")
+
+
+def filter_rows(rows, minimum_rating=None, start_year=None, end_year=None):
+    """
+    Yields the (title, year, rating) tuples matching the same filters
+    as main.filter_movies. Each filter can be None.
+    """
+    for title, year, rating in rows:
+        if minimum_rating is not None and rating < minimum_rating:
+            continue
+
+        if start_year is not None and year < start_year:
+            continue
+
+        if end_year is not None and year > end_year:
+            continue
+
+        yield title, year, rating
+
+
+def _write_run(rows):
+    """
+    Writes a sorted run of (title, year, rating) tuples to a temporary
+    file, one JSON array per line, and returns the file rewound.
+    """
+    run_file = tempfile.TemporaryFile("w+", encoding="utf-8")
+    for row in rows:
+        run_file.write(json.dumps(row))
+        run_file.write("\n")
+
+    run_file.seek(0)
+    return run_file
+
+
+def _read_run(run_file):
+    """
+    Yields the (title, year, rating) tuples of a run written by _write_run.
+    """
+    for line in run_file:
+        yield tuple(json.loads(line))
+
+
+def external_sort(rows, key, reverse=False, run_size=SORT_RUN_SIZE):
+    """
+    Yields rows in sorted order while holding at most run_size of them
+    in memory. Rows are sorted in runs of run_size; if there is more than
+    one run, each is spilled to a temporary file and the runs are merged.
+    The sort is stable, like sorted().
+    """
+    rows = iter(rows)
+    runs = []
+    try:
+        while True:
+            run = []
+            for row in rows:
+                run.append(row)
+                if len(run) == run_size:
+                    break
+
+            run.sort(key=key, reverse=reverse)
+            if len(run) < run_size and not runs:
+                # Everything fit in memory.
+                yield from run
+                return
+
+            if run:
+                runs.append(_write_run(run))
+            if len(run) < run_size:
+                break
+
+        yield from heapq.merge(*(_read_run(run_file) for run_file in runs), key=key, reverse=reverse)
+
+    finally:
+        for run_file in runs:
+            run_file.close()
+
+
+def select_movies(minimum_rating=None, start_year=None, end_year=None, sort_by=None):
+    """
+    Streams (title, year, rating) tuples from the movie database,
+    using the same filters as main.filter_movies.
+
+    sort_by can be "rating" or "year" (both descending, like the sort
+    commands). Sorting holds at most SORT_RUN_SIZE rows in memory;
+    larger results are sorted through temporary files.
+    """
+    if sort_by is not None and sort_by not in SORT_ORDERS:
+        raise ValueError(f"Invalid sort order {sort_by}! Choose from: {', '.join(SORT_ORDERS)}")
+
+    matching_movies = filter_rows(iter_movie_rows(), minimum_rating, start_year, end_year)
+
+    if sort_by == "rating":
+        return external_sort(matching_movies, lambda item: item[2], True, SORT_RUN_SIZE)
+
+    if sort_by == "year":
+        return external_sort(matching_movies, lambda item: item[1], True, SORT_RUN_SIZE)
+
+    return matching_movies
+
+
+def write_csv(movies, file_path):
+    """
+    Writes (title, year, rating) tuples to a CSV file row by row.
+    Returns the number of rows written.
+    """
+    count = 0
+    with open(file_path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(("title", "year", "rating"))
+        for movie in movies:
+            writer.writerow(movie)
+            count += 1
+
+    return count
+
+
+def write_jsonl(movies, file_path):
+    """
+    Writes (title, year, rating) tuples to a JSON Lines file,
+    one movie object per line. Returns the number of rows written.
+    """
+    count = 0
+    with open(file_path, "w", encoding="utf-8") as handle:
+        for title, year, rating in movies:
+            handle.write(json.dumps({"title": title, "year": year, "rating": rating}))
+            handle.write("\n")
+            count += 1
+
+    return count
+
+
+def _little_endian_bytes(values):
+    """
+    Returns the raw bytes of an array in little-endian order.
+    """
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+def _write_row_group(handle, rows):
+    """
+    Writes one row group to the columnar file and returns its offset.
+    """
+    offset = handle.tell()
+    years = array("i", (year for _, year, _ in rows))
+    ratings = array("d", (rating for _, _, rating in rows))
+    encoded_titles = [title.encode("utf-8") for title, _, _ in rows]
+
+    title_offsets = array("I", [0])
+    for encoded_title in encoded_titles:
+        title_offsets.append(title_offsets[-1] + len(encoded_title))
+
+    handle.write(_little_endian_bytes(years))
+    handle.write(_little_endian_bytes(ratings))
+    handle.write(_little_endian_bytes(title_offsets))
+    handle.write(b"".join(encoded_titles))
+    return offset
+
+
+def write_columnar(movies, file_path, row_group_size=ROW_GROUP_SIZE):
+    """
+    Writes (title, year, rating) tuples to a compact columnar binary file.
+    Rows are buffered one row group at a time. Returns the number of rows written.
+    """
+    footer = []
+    rows = []
+    count = 0
+    with open(file_path, "wb") as handle:
+        handle.write(MAGIC)
+        for movie in movies:
+            rows.append(movie)
+            if len(rows) == row_group_size:
+                footer.append((_write_row_group(handle, rows), len(rows)))
+                count += len(rows)
+                rows = []
+
+        if rows:
+            footer.append((_write_row_group(handle, rows), len(rows)))
+            count += len(rows)
+
+        footer_offset = handle.tell()
+        for group_offset, group_count in footer:
+            handle.write(FOOTER_ENTRY.pack(group_offset, group_count))
+        handle.write(TRAILER.pack(footer_offset, len(footer), MAGIC))
+
+    return count
+
+
+def read_columnar_footer(handle):
+    """
+    Reads the footer of an open columnar file.
+    Returns a list of (group offset, row count) tuples.
+    """
+    handle.seek(-TRAILER.size, 2)
+    footer_offset, group_count, magic = TRAILER.unpack(handle.read(TRAILER.size))
+    if magic != MAGIC:
+        raise ValueError("Not a movie columnar file.")
+
+    handle.seek(footer_offset)
+    footer_data = handle.read(FOOTER_ENTRY.size * group_count)
+    return list(FOOTER_ENTRY.iter_unpack(footer_data))
+
+
+def _read_array(handle, typecode, count):
+    """
+    Reads `count` little-endian values of the given array type.
+    """
+    values = array(typecode)
+    values.frombytes(handle.read(values.itemsize * count))
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def read_row_group(handle, group_offset, count):
+    """
+    Reads one row group and returns its years, ratings,
+    title offsets and raw title data.
+    """
+    handle.seek(group_offset)
+    years = _read_array(handle, "i", count)
+    ratings = _read_array(handle, "d", count)
+    title_offsets = _read_array(handle, "I", count + 1)
+    title_data = handle.read(title_offsets[-1])
+    return years, ratings, title_offsets, title_data
+
+
+def read_columnar_row(handle, group_offset, count, index):
+    """
+    Reads a single row of a row group without reading the rest of it,
+    and returns it as a (title, year, rating) tuple.
+    """
+    handle.seek(group_offset + 4 * index)
+    year = _read_array(handle, "i", 1)[0]
+
+    handle.seek(group_offset + 4 * count + 8 * index)
+    rating = _read_array(handle, "d", 1)[0]
+
+    offsets_start = group_offset + 12 * count
+    handle.seek(offsets_start + 4 * index)
+    title_start, title_end = _read_array(handle, "I", 2)
+
+    handle.seek(offsets_start + 4 * (count + 1) + title_start)
+    title = handle.read(title_end - title_start).decode("utf-8")
+    return title, year, rating
+
+
+def read_columnar(file_path):
+    """
+    Yields (title, year, rating) tuples from a columnar file,
+    one row group at a time.
+    """
+    with open(file_path, "rb") as handle:
+        for group_offset, count in read_columnar_footer(handle):
+            years, ratings, title_offsets, title_data = read_row_group(handle, group_offset, count)
+            for index in range(count):
+                title = title_data[title_offsets[index]:title_offsets[index + 1]].decode("utf-8")
+                yield title, years[index], ratings[index]
+
+
+def export_movies(file_path, export_format=None, minimum_rating=None,
+                  start_year=None, end_year=None, sort_by=None):
+    """
+    Exports the movie database to CSV, JSON Lines or the columnar format.
+    The format is taken from the file extension unless given.
+    Returns the number of movies written.
+    """
+    if export_format is None:
+        extension = os.path.splitext(file_path)[1].lower()
+        export_format = EXPORT_FORMATS.get(extension)
+
+    writers = {
+        "csv": write_csv,
+        "jsonl": write_jsonl,
+        "columnar": write_columnar
+    }
+
+    if export_format not in writers:
+        raise ValueError(f"Unknown export format! Use one of: {', '.join(EXPORT_FORMATS)}")
+
+    movies = select_movies(minimum_rating, start_year, end_year, sort_by)
+    return writers[export_format](movies, file_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the movie database.")
+    parser.add_argument("file", help="output file (.csv, .jsonl or .mcol)")
+    parser.add_argument("--format", choices=("csv", "jsonl", "columnar"))
+    parser.add_argument("--min-rating", type=float)
+    parser.add_argument("--start-year", type=int)
+    parser.add_argument("--end-year", type=int)
+    parser.add_argument("--sort", choices=SORT_ORDERS,
+                        help=f"sort descending; more than {SORT_RUN_SIZE} rows are sorted through temporary files")
+    args = parser.parse_args()
+
+    written = export_movies(args.file, args.format, args.min_rating,
+                            args.start_year, args.end_year, args.sort)
+    print(f"{written} movies exported to {args.file}")
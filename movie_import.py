@@ -0,0 +1,252 @@
+import csv
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import movie_storage as ms
+
+
+# Number of raw lines sent to a worker process at once.
+CHUNK_SIZE = 20000
+
+# Accepted header names for each column (IMDb-style dumps use the second ones).
+TITLE_COLUMNS = ("title", "primarytitle", "originaltitle", "name")
+YEAR_COLUMNS = ("year", "startyear", "release_year")
+RATING_COLUMNS = ("rating", "averagerating", "imdb_rating")
+
+
+def parse_rating(raw_rating):
+    """
+    Converts a rating string to a float, accepting comma decimals.
+    Returns None if the rating is not a number between 0 and 10.
+    """
+    try:
+        rating = float(raw_rating.strip().replace(",", "."))
+    except ValueError:
+        return None
+
+    if not 0 <= rating <= 10:
+        return None
+
+    return rating
+
+
+def parse_year(raw_year):
+    """
+    Converts a year string to an int.
+    Returns None if the year is not a plain number (e.g. IMDb's '\\N').
+    """
+    raw_year = raw_year.strip()
+    # isdigit() alone also accepts digits like '²' that int() rejects.
+    if not (raw_year.isascii() and raw_year.isdigit()):
+        return None
+
+    return int(raw_year)
+
+
+def find_columns(header):
+    """
+    Takes the header row of a dump and returns the indexes of the
+    title, year and rating columns. Raises ValueError if one is missing.
+    """
+    names = [column.strip().casefold() for column in header]
+    indexes = []
+    for label, aliases in (("title", TITLE_COLUMNS), ("year", YEAR_COLUMNS), ("rating", RATING_COLUMNS)):
+        index = next((names.index(alias) for alias in aliases if alias in names), None)
+        if index is None:
+            raise ValueError(f"No {label} column found in header: {', '.join(header)}")
+        indexes.append(index)
+
+    return tuple(indexes)
+
+
+def csv_dialect(file_path):
+    """
+    Returns the csv.reader keyword arguments for the given file.
+    TSV dumps (like IMDb's) are tab separated and don't use quoting.
+    """
+    if file_path.lower().endswith((".tsv", ".tsv.txt")):
+        return {"delimiter": "\t", "quoting": csv.QUOTE_NONE}
+
+    return {"delimiter": ","}
+
+
+def parse_chunk(lines, columns, dialect):
+    """
+    Parses and validates a chunk of raw lines. Titles are normalized
+    like main.add_movie does and get their search key for deduplication.
+    This runs inside a worker process, so it only gets plain data.
+    Returns a list of (title, year, rating, search key) tuples and the
+    number of rejected rows.
+    """
+    title_index, year_index, rating_index = columns
+    last_index = max(columns)
+    movies = []
+    rejected = 0
+
+    for row in csv.reader(lines, **dialect):
+        if len(row) <= last_index:
+            rejected += 1
+            continue
+
+        title = ms.normalize_title(row[title_index])
+        year = parse_year(row[year_index])
+        rating = parse_rating(row[rating_index])
+
+        if not title or year is None or rating is None:
+            rejected += 1
+            continue
+
+        movies.append((title, year, rating, ms.title_search_key(title)))
+
+    return movies, rejected
+
+
+def in_quoted_field(line, delimiter, in_quotes):
+    """
+    Scans one raw line the way csv.reader does and returns whether it
+    ends inside a quoted field. A quote only opens a field when it is
+    the first character of the field, and '""' inside a quoted field
+    is an escaped quote.
+    """
+    if not in_quotes and '"' not in line:
+        return False
+
+    field_start = not in_quotes
+    position = 0
+    while position < len(line):
+        char = line[position]
+        if in_quotes:
+            if char == '"':
+                if line[position + 1:position + 2] == '"':
+                    position += 1
+                else:
+                    in_quotes = False
+        elif char == '"' and field_start:
+            in_quotes = True
+            field_start = False
+        else:
+            field_start = char == delimiter
+
+        position += 1
+
+    return in_quotes
+
+
+def read_chunks(handle, chunk_size, dialect):
+    """
+    Yields lists of raw lines from an open file, chunk_size lines at a time.
+    For quoted CSV a record can span several lines, so a chunk is only
+    closed at a line that doesn't end inside a quoted field.
+    """
+    quoted = dialect.get("quoting") != csv.QUOTE_NONE
+    delimiter = dialect["delimiter"]
+    chunk = []
+    in_quotes = False
+    for line in handle:
+        chunk.append(line)
+        if quoted:
+            in_quotes = in_quoted_field(line, delimiter, in_quotes)
+
+        if len(chunk) >= chunk_size and not in_quotes:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def import_movies(file_path, workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Imports movies from a CSV or TSV file into the movie database.
+
+    The file is streamed in chunks which are parsed by a process pool.
+    Only a few chunks are in flight at a time, so memory stays bounded by
+    the chunk size and the number of unique movies. Titles that already
+    exist (in the database or earlier in the file) are skipped; titles
+    only differing in case, accents or spacing count as the same.
+    The database is written once at the end.
+
+    Returns a dictionary with the import counters.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    movies = ms.get_movies()
+    titles = ms.TitleDictionary(movies)
+    dialect = csv_dialect(file_path)
+
+    summary = {"rows": 0, "added": 0, "duplicates": 0, "rejected": 0}
+    start_time = time.perf_counter()
+
+    def merge(result):
+        new_movies, rejected = result
+        summary["rows"] += len(new_movies) + rejected
+        summary["rejected"] += rejected
+        for title, year, rating, search_key in new_movies:
+            if search_key in titles.ids_by_key:
+                summary["duplicates"] += 1
+                continue
+
+            titles.add(title, search_key)
+            movies[title] = {
+                "rating": rating,
+                "year": year
+            }
+            summary["added"] += 1
+
+        elapsed = time.perf_counter() - start_time
+        rows_per_sec = summary["rows"] / elapsed if elapsed else 0
+        print(f"{summary['rows']} rows processed, {summary['added']} added ({rows_per_sec:.0f} rows/sec)")
+
+    # utf-8-sig drops the byte order mark Excel puts before the header.
+    with open(file_path, "r", newline="", encoding="utf-8-sig") as handle:
+        header = next(csv.reader([handle.readline()], **dialect), None)
+        if not header:
+            raise ValueError(f"File {file_path} is empty.")
+
+        columns = find_columns(header)
+        chunks = read_chunks(handle, chunk_size, dialect)
+
+        if workers <= 1:
+            for chunk in chunks:
+                merge(parse_chunk(chunk, columns, dialect))
+
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # Results are merged in file order so the first duplicate wins.
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(executor.submit(parse_chunk, chunk, columns, dialect))
+                    if len(pending) >= workers * 2:
+                        merge(pending.popleft().result())
+
+                while pending:
+                    merge(pending.popleft().result())
+
+    if summary["added"]:
+        ms.save_movies(movies)
+
+    summary["seconds"] = time.perf_counter() - start_time
+    return summary
+
+
+def print_summary(summary):
+    """
+    Prints the counters returned by import_movies.
+    """
+    print(
+        f"Imported {summary['added']} movies from {summary['rows']} rows "
+        f"in {summary['seconds']:.2f}s "
+        f"({summary['duplicates']} duplicates, {summary['rejected']} rejected)"
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python movie_import.py <file.csv|file.tsv> [workers]")
+        sys.exit(1)
+
+    worker_count = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    print_summary(import_movies(sys.argv[1], workers=worker_count))
@@ -0,0 +1,333 @@
+import math
+import re
+import shlex
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from functools import lru_cache
+from fuzzywuzzy import process
+import movie_storage as ms
+
+
+# A parsed query. `bounds` holds (field, low, high) for rating and year,
+# where low and high are (value, inclusive) tuples or None.
+Query = namedtuple("Query", ["title_exact", "title_fuzzy", "bounds", "order_field", "order_desc", "limit"])
+
+# A compiled query plus the access path chosen for it:
+#   "exact"       title dictionary lookup (canonical title or search key)
+#   "index_range" range scan on the sorted rating/year indexes
+#   "fuzzy"       fuzzy match over all titles; there is no fuzzy index, every
+#                 distinct search key is scored (titles sharing a key once)
+#   "full_scan"   check every movie
+Plan = namedtuple("Plan", ["query", "access"])
+
+NUMERIC_FIELDS = ("rating", "year")
+ORDER_FIELDS = ("title", "rating", "year")
+FUZZY_SCORE_CUTOFF = 70
+PLAN_CACHE_SIZE = 256
+
+PREDICATE_PATTERN = re.compile(r"^(title|rating|year)(>=|<=|>|<|=|:|~)(.+)$", re.IGNORECASE)
+
+# Loaded movies and their indexes, rebuilt when the catalog version changes.
+_index_cache = {"key": None, "indexes": None}
+
+
+def _parse_number(field, raw_value):
+    """
+    Converts a query value to an int (year) or float (rating).
+    Raises ValueError with a readable message if it isn't a number.
+    """
+    try:
+        if field == "year":
+            return int(raw_value)
+        value = float(raw_value.replace(",", "."))
+
+    except ValueError:
+        raise ValueError(f"Invalid {field} value: {raw_value}") from None
+
+    # float() accepts nan and inf, which would make every comparison meaningless.
+    if not math.isfinite(value):
+        raise ValueError(f"Invalid {field} value: {raw_value}")
+
+    return value
+
+
+def _tighten(current, new, pick_larger):
+    """
+    Combines two bounds of the same side and returns the stricter one.
+    """
+    if current is None:
+        return new
+
+    if current[0] == new[0]:
+        return current[0], current[1] and new[1]
+
+    if (new[0] > current[0]) == pick_larger:
+        return new
+
+    return current
+
+
+def parse_query(expression):
+    """
+    Parses a query expression such as
+    'rating>=8 year:1990..2000 title~"godfather" order by year desc limit 10'
+    and returns a Query. Raises ValueError for invalid expressions.
+    """
+    tokens = shlex.split(expression)
+    title_exact = None
+    title_fuzzy = None
+    lows = {field: None for field in NUMERIC_FIELDS}
+    highs = {field: None for field in NUMERIC_FIELDS}
+    order_field = None
+    order_desc = False
+    limit = None
+
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+
+        if token.lower() == "order":
+            if index + 2 >= len(tokens) or tokens[index + 1].lower() != "by":
+                raise ValueError("Expected 'order by <field>'")
+
+            order_field = tokens[index + 2].lower()
+            if order_field not in ORDER_FIELDS:
+                raise ValueError(f"Cannot order by {order_field}! Choose from: {', '.join(ORDER_FIELDS)}")
+
+            index += 3
+            if index < len(tokens) and tokens[index].lower() in ("asc", "desc"):
+                order_desc = tokens[index].lower() == "desc"
+                index += 1
+            continue
+
+        if token.lower() == "limit":
+            if index + 1 >= len(tokens) or not tokens[index + 1].isdigit():
+                raise ValueError("Expected a number after 'limit'")
+
+            limit = int(tokens[index + 1])
+            index += 2
+            continue
+
+        match = PREDICATE_PATTERN.match(token)
+        if not match:
+            raise ValueError(f"Invalid query term: {token}")
+
+        field, operator, raw_value = match.group(1).lower(), match.group(2), match.group(3)
+        index += 1
+
+        if field == "title":
+            if operator == "~":
+                title_fuzzy = ms.title_search_key(raw_value)
+            elif operator in ("=", ":"):
+                title_exact = raw_value.strip()
+            else:
+                raise ValueError(f"Titles only support '=' and '~': {token}")
+            continue
+
+        if operator == "~":
+            raise ValueError(f"'~' only works on titles: {token}")
+
+        if operator == ":" and ".." in raw_value:
+            raw_low, raw_high = raw_value.split("..", 1)
+            new_low = (_parse_number(field, raw_low), True) if raw_low else None
+            new_high = (_parse_number(field, raw_high), True) if raw_high else None
+        else:
+            value = _parse_number(field, raw_value)
+            new_low = (value, operator == ">=") if operator in (">", ">=") else None
+            new_high = (value, operator == "<=") if operator in ("<", "<=") else None
+            if operator in ("=", ":"):
+                new_low = new_high = (value, True)
+
+        if new_low is not None:
+            lows[field] = _tighten(lows[field], new_low, pick_larger=True)
+        if new_high is not None:
+            highs[field] = _tighten(highs[field], new_high, pick_larger=False)
+
+    bounds = tuple(
+        (field, lows[field], highs[field])
+        for field in NUMERIC_FIELDS
+        if lows[field] is not None or highs[field] is not None
+    )
+    return Query(title_exact, title_fuzzy, bounds, order_field, order_desc, limit)
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def compile_query(expression):
+    """
+    Parses an expression and picks the cheapest access path for it.
+    Compiled plans are cached, so repeating a query skips parsing.
+    """
+    query = parse_query(expression)
+
+    if query.title_exact is not None:
+        access = "exact"
+    elif query.bounds:
+        # Range predicates narrow the candidates before any fuzzy matching.
+        access = "index_range"
+    elif query.title_fuzzy is not None:
+        access = "fuzzy"
+    else:
+        access = "full_scan"
+
+    return Plan(query, access)
+
+
+def build_indexes(movies, titles):
+    """
+    Builds sorted (value, title ID) indexes on rating and year, stored
+    as a key list for bisect and a compact array of title IDs, next to
+    the title dictionary of the movies.
+    """
+    indexes = {"titles": titles}
+    for field in NUMERIC_FIELDS:
+        entries = sorted((movie_info[field], titles.ids[title]) for title, movie_info in movies.items())
+        indexes[field] = ([value for value, _ in entries], array("I", (title_id for _, title_id in entries)))
+
+    return indexes
+
+
+def get_indexed_movies():
+    """
+    Returns the movies and their indexes. Both are reused until
+    the catalog version changes.
+    """
+    key = ms.get_catalog_version()
+    if _index_cache["key"] != key:
+        movies, titles = ms.get_catalog()
+        _index_cache["indexes"] = (movies, build_indexes(movies, titles))
+        _index_cache["key"] = key
+
+    return _index_cache["indexes"]
+
+
+def _in_bounds(value, low, high):
+    """
+    Checks a value against a (value, inclusive) low and high bound.
+    """
+    if low is not None and (value < low[0] or (value == low[0] and not low[1])):
+        return False
+
+    if high is not None and (value > high[0] or (value == high[0] and not high[1])):
+        return False
+
+    return True
+
+
+def _index_slice(keys, low, high):
+    """
+    Returns the start and end positions of a bounded range in a sorted key list.
+    """
+    start = 0
+    end = len(keys)
+    if low is not None:
+        start = bisect_left(keys, low[0]) if low[1] else bisect_right(keys, low[0])
+    if high is not None:
+        end = bisect_right(keys, high[0]) if high[1] else bisect_left(keys, high[0])
+
+    return start, max(start, end)
+
+
+def _narrowest_range(bounds, indexes):
+    """
+    Returns the field, start and end position of the bounded index
+    range that holds the fewest movies, which is the one to scan.
+    """
+    best = None
+    for field, low, high in bounds:
+        start, end = _index_slice(indexes[field][0], low, high)
+        if best is None or end - start < best[2] - best[1]:
+            best = (field, start, end)
+
+    return best
+
+
+def _fuzzy_match(titles, search_key, candidates=None):
+    """
+    Fuzzy matches a search key against the search keys of the candidate
+    title IDs (all titles if None) and returns the matching IDs, best first.
+    Titles sharing a search key are only scored once.
+    """
+    if candidates is None:
+        ids_by_key = titles.ids_by_key
+    else:
+        ids_by_key = {}
+        for title_id in candidates:
+            ids_by_key.setdefault(titles.search_keys[title_id], []).append(title_id)
+
+    matches = process.extractBests(search_key, ids_by_key.keys(), score_cutoff=FUZZY_SCORE_CUTOFF, limit=None)
+    return [title_id for key, _ in matches for title_id in ids_by_key[key]]
+
+
+def run_plan(plan, movies, indexes):
+    """
+    Runs a compiled plan against the movies and returns a list of
+    (title, year, rating) tuples.
+    """
+    query = plan.query
+    titles = indexes["titles"]
+    presorted = False
+
+    if plan.access == "exact":
+        title_id = titles.find(query.title_exact)
+        candidates = [] if title_id is None else [title_id]
+
+    elif plan.access == "index_range":
+        field, start, end = _narrowest_range(query.bounds, indexes)
+        candidates = indexes[field][1][start:end]
+        if query.order_field == field and query.title_fuzzy is None:
+            presorted = True
+            if query.order_desc:
+                candidates.reverse()
+
+    elif plan.access == "fuzzy":
+        candidates = None
+
+    else:
+        candidates = range(len(titles))
+
+    if query.title_fuzzy is not None:
+        # Best matches first, like search_movie.
+        candidates = _fuzzy_match(titles, query.title_fuzzy, candidates)
+
+    bounds = query.bounds
+    results = []
+    for title_id in candidates:
+        title = titles.titles[title_id]
+        movie_info = movies[title]
+        if all(_in_bounds(movie_info[field], low, high) for field, low, high in bounds):
+            results.append((title, movie_info["year"], movie_info["rating"]))
+            if presorted and query.limit is not None and len(results) == query.limit:
+                break
+
+    if query.order_field is not None and not presorted:
+        position = {"title": 0, "year": 1, "rating": 2}[query.order_field]
+        results.sort(key=lambda item: item[position], reverse=query.order_desc)
+
+    if query.limit is not None:
+        results = results[:query.limit]
+
+    return results
+
+
+def run_query(expression):
+    """
+    Compiles (or reuses) the plan for an expression and runs it
+    against the movie database. Raises ValueError for invalid expressions.
+    """
+    plan = compile_query(expression.strip())
+    movies, indexes = get_indexed_movies()
+    return run_plan(plan, movies, indexes)
+
+
+if __name__ == "__main__":
+    # Batch mode: queries as arguments, or one query per line on stdin.
+    expressions = sys.argv[1:] or [line for line in sys.stdin if line.strip()]
+    for query_expression in expressions:
+        print(f"> {query_expression.strip()}")
+        try:
+            for movie_title, movie_year, movie_rating in run_query(query_expression):
+                print(f"{movie_title} ({movie_year}): {movie_rating}")
+        except ValueError as error:
+            print(f"Invalid query: {error}")
@@ -0,0 +1,147 @@
+import argparse
+import heapq
+import random
+from bisect import bisect_right
+import movie_export as me
+import movie_storage as ms
+
+
+def random_movie(generator=random):
+    """
+    Picks one (title, year, rating) movie uniformly at random.
+    If the catalog is already loaded for its current version (e.g. by a
+    lookup), a title ID is drawn from its title dictionary in O(1).
+    Otherwise the database is streamed through a reservoir, so it is
+    never loaded just to pick one movie. Returns None if it is empty.
+    """
+    catalog = ms.get_cached_catalog()
+    if catalog is None:
+        picked = reservoir_sample(me.iter_movie_rows(), 1, generator)
+        return picked[0] if picked else None
+
+    movies, titles = catalog
+    if not titles:
+        return None
+
+    title = titles.titles[generator.randrange(len(titles))]
+    return title, movies[title]["year"], movies[title]["rating"]
+
+
+def reservoir_sample(rows, k=1, generator=random):
+    """
+    Picks k rows uniformly at random without replacement from a stream
+    of any length, holding only k rows in memory (reservoir sampling).
+    Returns fewer than k rows if the stream is shorter.
+    """
+    reservoir = []
+    for seen, row in enumerate(rows):
+        if seen < k:
+            reservoir.append(row)
+            continue
+
+        position = generator.randrange(seen + 1)
+        if position < k:
+            reservoir[position] = row
+
+    return reservoir
+
+
+def weighted_reservoir_sample(rows, k=1, generator=random):
+    """
+    Picks k (title, year, rating) rows without replacement from a stream,
+    each with a probability proportional to its rating. Every row gets
+    the key u ** (1 / rating) and the k largest keys are kept in a heap.
+    Movies rated 0 are never picked.
+    """
+    heap = []
+    if k <= 0:
+        return heap
+
+    for row in rows:
+        rating = row[2]
+        if rating <= 0:
+            continue
+
+        key = generator.random() ** (1 / rating)
+        if len(heap) < k:
+            heapq.heappush(heap, (key, row))
+        elif key > heap[0][0]:
+            heapq.heapreplace(heap, (key, row))
+
+    return [row for _, row in sorted(heap, reverse=True)]
+
+
+def sample_columnar(file_path, k=1, generator=random):
+    """
+    Picks k rows uniformly at random without replacement from a columnar
+    export. Only the footer and the picked rows are read, so each pick
+    costs a few seeks no matter how large the file is.
+    """
+    with open(file_path, "rb") as handle:
+        footer = me.read_columnar_footer(handle)
+
+        # First global row index of every row group.
+        group_starts = []
+        total_rows = 0
+        for _, count in footer:
+            group_starts.append(total_rows)
+            total_rows += count
+
+        picked = []
+        for row_index in generator.sample(range(total_rows), min(k, total_rows)):
+            group = bisect_right(group_starts, row_index) - 1
+            group_offset, count = footer[group]
+            picked.append(me.read_columnar_row(handle, group_offset, count, row_index - group_starts[group]))
+
+    return picked
+
+
+def sample_movies(k=1, minimum_rating=None, start_year=None, end_year=None,
+                  weighted=False, columnar_file=None, generator=random):
+    """
+    Returns up to k random (title, year, rating) movies without replacement.
+
+    With a columnar export and no filters or weights, rows are picked
+    directly from the file. Otherwise the movies (from the columnar file
+    or the JSON database) are streamed through the filters into a
+    reservoir, uniform or weighted by rating.
+    """
+    filtered = minimum_rating is not None or start_year is not None or end_year is not None
+
+    if columnar_file is not None and not filtered and not weighted:
+        return sample_columnar(columnar_file, k, generator)
+
+    rows = me.read_columnar(columnar_file) if columnar_file is not None else me.iter_movie_rows()
+    rows = me.filter_rows(rows, minimum_rating, start_year, end_year)
+
+    if weighted:
+        return weighted_reservoir_sample(rows, k, generator)
+
+    return reservoir_sample(rows, k, generator)
+
+
+def sample_size(raw_value):
+    """
+    Converts the k argument of the command line to an int of 0 or more.
+    """
+    value = int(raw_value)
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"k must be 0 or more, not {value}")
+
+    return value
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pick random movies.")
+    parser.add_argument("k", type=sample_size, nargs="?", default=1, help="number of movies")
+    parser.add_argument("--weighted", action="store_true", help="weight movies by rating")
+    parser.add_argument("--min-rating", type=float)
+    parser.add_argument("--start-year", type=int)
+    parser.add_argument("--end-year", type=int)
+    parser.add_argument("--columnar", help="sample from a .mcol export instead of the database")
+    args = parser.parse_args()
+
+    sample = sample_movies(args.k, args.min_rating, args.start_year, args.end_year,
+                           args.weighted, args.columnar)
+    for movie_title, movie_year, movie_rating in sample:
+        print(f"{movie_title} ({movie_year}): {movie_rating}")
@@ -0,0 +1,204 @@
+import hashlib
+import math
+import random
+import movie_storage as ms
+
+
+# Default relative error for approximate stats.
+DEFAULT_ERROR = 0.01
+
+# Most tied best/worst movie titles kept in approximate stats.
+MAX_TIES = 10
+
+PERCENTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+
+class QuantileSketch:
+    """
+    A KLL quantile sketch. Values are kept in levels of compactors;
+    when a level is full it is sorted and every other value moves up a
+    level with twice the weight. Memory is O(1 / error) values and
+    quantiles have a rank error of about `error`.
+    """
+
+    def __init__(self, error=DEFAULT_ERROR):
+        self.k = max(8, math.ceil(2 / error))
+        self.count = 0
+        self.size = 0
+        self.compactors = [[]]
+        self.max_size = self._capacity(0)
+
+    def _capacity(self, level):
+        """
+        Returns how many values a level holds before it is compacted.
+        Lower levels get smaller capacities, the top level gets k.
+        """
+        depth = len(self.compactors) - level - 1
+        return math.ceil(self.k * (2 / 3) ** depth) + 1
+
+    def add(self, value):
+        """
+        Adds a value to the sketch.
+        """
+        self.compactors[0].append(value)
+        self.count += 1
+        self.size += 1
+        if self.size >= self.max_size:
+            self._compress()
+
+    def _compress(self):
+        """
+        Compacts full levels, starting from the bottom,
+        until the sketch fits its size again.
+        """
+        for level, compactor in enumerate(self.compactors):
+            if len(compactor) < self._capacity(level):
+                continue
+
+            if level + 1 == len(self.compactors):
+                self.compactors.append([])
+                self.max_size = sum(self._capacity(height) for height in range(len(self.compactors)))
+
+            compactor.sort()
+            # With an odd number of values the largest stays on this level.
+            kept = [compactor.pop()] if len(compactor) % 2 else []
+            self.compactors[level + 1].extend(compactor[random.randint(0, 1)::2])
+            compactor[:] = kept
+
+            self.size = sum(len(values) for values in self.compactors)
+            if self.size < self.max_size:
+                break
+
+    def quantiles(self, fractions):
+        """
+        Returns the approximate values at the given fractions (0-1)
+        of the sorted stream, e.g. 0.5 for the median.
+        """
+        weighted = sorted(
+            (value, 2 ** level)
+            for level, compactor in enumerate(self.compactors)
+            for value in compactor
+        )
+        if not weighted:
+            return [None for _ in fractions]
+
+        total_weight = sum(weight for _, weight in weighted)
+        results = []
+        for fraction in fractions:
+            target = fraction * total_weight
+            cumulative = 0
+            result = weighted[-1][0]
+            for value, weight in weighted:
+                cumulative += weight
+                if cumulative >= target:
+                    result = value
+                    break
+            results.append(result)
+
+        return results
+
+    def quantile(self, fraction):
+        """
+        Returns the approximate value at the given fraction (0-1).
+        """
+        return self.quantiles([fraction])[0]
+
+
+class HyperLogLog:
+    """
+    A HyperLogLog distinct counter. Memory is 2 ** precision bytes and
+    the standard error is about 1.04 / sqrt(2 ** precision).
+    """
+
+    def __init__(self, error=DEFAULT_ERROR):
+        precision = math.ceil(math.log2((1.04 / error) ** 2))
+        self.precision = min(16, max(4, precision))
+        self.registers = bytearray(2 ** self.precision)
+
+    def add(self, value):
+        """
+        Adds a value (anything with a stable str()) to the counter.
+        """
+        digest = hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest()
+        hashed = int.from_bytes(digest, "big")
+        remaining_bits = 64 - self.precision
+        index = hashed >> remaining_bits
+        rest = hashed & ((1 << remaining_bits) - 1)
+        rank = remaining_bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def estimate(self):
+        """
+        Returns the estimated number of distinct values added.
+        """
+        register_count = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / register_count)
+        raw_estimate = alpha * register_count ** 2 / sum(2.0 ** -rank for rank in self.registers)
+
+        # Small cardinalities are more accurate with linear counting.
+        zero_registers = self.registers.count(0)
+        if raw_estimate <= 2.5 * register_count and zero_registers:
+            return round(register_count * math.log(register_count / zero_registers))
+
+        return round(raw_estimate)
+
+
+def _add_tie(extreme, title):
+    """
+    Counts a movie tied for the best or worst rating,
+    keeping at most MAX_TIES of their titles.
+    """
+    extreme["count"] += 1
+    if len(extreme["movies"]) < MAX_TIES:
+        extreme["movies"].append(title)
+
+
+def approximate_movie_stats(error=DEFAULT_ERROR):
+    """
+    Computes movie stats in a single streaming pass over the database
+    with bounded memory. Average, best and worst ratings are exact;
+    median and percentiles come from a quantile sketch and the number
+    of distinct years from HyperLogLog, both within about `error`.
+    Only the first MAX_TIES best/worst movie titles are kept.
+    Returns None if there are no movies.
+    """
+    ratings = QuantileSketch(error)
+    years = HyperLogLog(error)
+    rating_sum = 0
+    best = {"rating": None, "movies": [], "count": 0}
+    worst = {"rating": None, "movies": [], "count": 0}
+
+    for title, movie_info in ms.iter_movies():
+        rating = movie_info["rating"]
+        ratings.add(rating)
+        years.add(movie_info["year"])
+        rating_sum += rating
+
+        if best["rating"] is None or rating > best["rating"]:
+            best.update(rating=rating, movies=[title], count=1)
+        elif rating == best["rating"]:
+            _add_tie(best, title)
+
+        if worst["rating"] is None or rating < worst["rating"]:
+            worst.update(rating=rating, movies=[title], count=1)
+        elif rating == worst["rating"]:
+            _add_tie(worst, title)
+
+    if not ratings.count:
+        return None
+
+    percentiles = ratings.quantiles(PERCENTILES)
+    return {
+        "count": ratings.count,
+        "average_rating": rating_sum / ratings.count,
+        "median_rating": percentiles[PERCENTILES.index(0.5)],
+        "percentiles": dict(zip(PERCENTILES, percentiles)),
+        "distinct_years": years.estimate(),
+        "best_rating": best["rating"],
+        "best_movies": best["movies"],
+        "best_count": best["count"],
+        "worst_rating": worst["rating"],
+        "worst_movies": worst["movies"],
+        "worst_count": worst["count"]
+    }
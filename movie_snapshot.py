@@ -0,0 +1,251 @@
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import movie_storage as ms
+
+
+# Snapshots are stored as a manifest per snapshot plus a shared block store:
+#   snapshots/<name>.json       bucket count and one block hash per bucket
+#   snapshots/blocks/<hash>     the movies of one bucket, as canonical JSON
+# Movies are assigned to buckets by ranges of their title hash, so an update
+# to a few movies only changes the hashes of a few blocks.
+SNAPSHOT_DIR = "snapshots"
+BUCKET_COUNT = 4096
+
+
+def bucket_of(title, bucket_count):
+    """
+    Returns the bucket of a title: its position in the title hash range.
+    """
+    title_hash = int.from_bytes(hashlib.sha1(title.encode("utf-8")).digest()[:4], "big")
+    return title_hash * bucket_count >> 32
+
+
+def encode_block(records):
+    """
+    Encodes the [title, year, rating] records of one bucket as canonical
+    JSON and returns the bytes and their SHA-256 hash.
+    """
+    data = json.dumps(sorted(records), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return data, hashlib.sha256(data).hexdigest()
+
+
+def _block_path(block_hash):
+    """
+    Returns the path of a block in the block store.
+    """
+    return os.path.join(SNAPSHOT_DIR, "blocks", block_hash)
+
+
+def read_block(block_hash):
+    """
+    Returns the records stored in a block of the block store.
+    """
+    with open(_block_path(block_hash), "rb") as handle:
+        return json.loads(handle.read())
+
+
+def _write_atomic(path, data):
+    """
+    Writes bytes to a file through a temporary file in the same folder,
+    so an interrupted write never leaves a truncated file at `path`.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    handle, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, path)
+
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def _write_block(data, block_hash):
+    """
+    Writes a block to the block store unless it is already there.
+    Blocks only appear once they are complete, so an existing block
+    can be trusted.
+    """
+    path = _block_path(block_hash)
+    if not os.path.exists(path):
+        _write_atomic(path, data)
+
+
+def _manifest_path(name):
+    """
+    Returns the path of a snapshot's manifest.
+    """
+    return os.path.join(SNAPSHOT_DIR, f"{name}.json")
+
+
+def _new_snapshot_name():
+    """
+    Returns a timestamp name for a snapshot, with a -1, -2, ... suffix
+    if a snapshot was already taken in the same second.
+    """
+    timestamp = time.strftime("%Y%m%d-%H%M%S")
+    name = timestamp
+    suffix = 0
+    while os.path.exists(_manifest_path(name)):
+        suffix += 1
+        name = f"{timestamp}-{suffix}"
+
+    return name
+
+
+def group_movies(movies, bucket_count):
+    """
+    Takes (title, movie_info) pairs and returns a dictionary of
+    bucket -> list of [title, year, rating] records.
+    """
+    buckets = {}
+    for title, movie_info in movies:
+        record = [title, movie_info["year"], movie_info["rating"]]
+        buckets.setdefault(bucket_of(title, bucket_count), []).append(record)
+
+    return buckets
+
+
+def create_snapshot(name=None, bucket_count=BUCKET_COUNT):
+    """
+    Takes a snapshot of the movie database. Every non-empty bucket is
+    written to the block store (blocks that already exist are reused),
+    then the manifest is saved as snapshots/<name>.json.
+    Returns the manifest.
+    """
+    if name is None:
+        name = _new_snapshot_name()
+
+    block_hashes = [None] * bucket_count
+    for bucket, records in group_movies(ms.iter_movies(), bucket_count).items():
+        data, block_hash = encode_block(records)
+        _write_block(data, block_hash)
+        block_hashes[bucket] = block_hash
+
+    manifest = {"name": name, "bucket_count": bucket_count, "blocks": block_hashes}
+    _write_atomic(_manifest_path(name), json.dumps(manifest).encode("utf-8"))
+
+    return manifest
+
+
+def load_snapshot(name):
+    """
+    Returns the manifest of a saved snapshot.
+    """
+    with open(_manifest_path(name), "r") as handle:
+        return json.load(handle)
+
+
+def diff_snapshots(old_manifest, new_manifest):
+    """
+    Computes the delta that turns the old snapshot into the new one.
+    The delta only holds the buckets whose block hash changed: the old
+    hash (to check the local copy against) and the new records.
+    """
+    if old_manifest["bucket_count"] != new_manifest["bucket_count"]:
+        raise ValueError("Snapshots have different bucket counts and can't be compared.")
+
+    changes = {}
+    for bucket, (old_hash, new_hash) in enumerate(zip(old_manifest["blocks"], new_manifest["blocks"])):
+        if old_hash == new_hash:
+            continue
+
+        changes[str(bucket)] = {
+            "old": old_hash,
+            "new": new_hash,
+            "records": read_block(new_hash) if new_hash else []
+        }
+
+    return {"bucket_count": new_manifest["bucket_count"], "changes": changes}
+
+
+def apply_delta(delta):
+    """
+    Applies a delta to the local movie database.
+
+    The local movies of every changed bucket must hash to the delta's
+    old block hash, otherwise the local copy has diverged and a
+    ValueError is raised before anything is written.
+    Returns the number of buckets that were replaced.
+    """
+    bucket_count = delta["bucket_count"]
+    changes = {int(bucket): change for bucket, change in delta["changes"].items()}
+
+    movies = ms.get_movies()
+    local_buckets = {}
+    for title, movie_info in movies.items():
+        bucket = bucket_of(title, bucket_count)
+        if bucket in changes:
+            local_buckets.setdefault(bucket, []).append([title, movie_info["year"], movie_info["rating"]])
+
+    for bucket, change in changes.items():
+        local_records = local_buckets.get(bucket)
+        local_hash = encode_block(local_records)[1] if local_records else None
+        if local_hash != change["old"]:
+            raise ValueError(f"Local copy doesn't match the delta base (bucket {bucket}).")
+
+        if change["records"] and encode_block(change["records"])[1] != change["new"]:
+            raise ValueError(f"Delta block for bucket {bucket} is corrupted.")
+
+    for bucket, change in changes.items():
+        for title, _, _ in local_buckets.get(bucket, []):
+            del movies[title]
+
+        for title, year, rating in change["records"]:
+            movies[title] = {
+                "rating": rating,
+                "year": year
+            }
+
+    if changes:
+        ms.save_movies(movies)
+
+    return len(changes)
+
+
+def write_delta(delta, file_path):
+    """
+    Saves a delta as compact JSON.
+    """
+    with open(file_path, "w") as handle:
+        json.dump(delta, handle, separators=(",", ":"))
+
+
+def read_delta(file_path):
+    """
+    Loads a delta saved with write_delta.
+    """
+    with open(file_path, "r") as handle:
+        return json.load(handle)
+
+
+if __name__ == "__main__":
+    usage = (
+        "Usage:\n"
+        "  python movie_snapshot.py snapshot [name]\n"
+        "  python movie_snapshot.py diff <old name> <new name> <delta file>\n"
+        "  python movie_snapshot.py apply <delta file>"
+    )
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+
+    if command == "snapshot":
+        snapshot = create_snapshot(sys.argv[2] if len(sys.argv) > 2 else None)
+        print(f"Snapshot {snapshot['name']} created")
+
+    elif command == "diff" and len(sys.argv) == 5:
+        movie_delta = diff_snapshots(load_snapshot(sys.argv[2]), load_snapshot(sys.argv[3]))
+        write_delta(movie_delta, sys.argv[4])
+        print(f"{len(movie_delta['changes'])} changed buckets written to {sys.argv[4]}")
+
+    elif command == "apply" and len(sys.argv) == 3:
+        print(f"{apply_delta(read_delta(sys.argv[2]))} buckets updated")
+
+    else:
+        print(usage)
+        sys.exit(1)
@@ -1,8 +1,180 @@
 import json
+import os
+import sys
+import unicodedata
 
 
 MOVIE_DB_FILE = "movie_database.json"
 
+# Number of characters read at a time by iter_movies.
+READ_SIZE = 65536
+
+# The loaded movies and their title dictionary, reused while the
+# catalog version stays the same. See get_catalog.
+_catalog_cache = {"version": None, "movies": None, "titles": None}
+
+# Bumped on every save in this process. Saves from other processes
+# (e.g. movie_import.py) are picked up through the file's stat instead.
+_catalog_version = 0
+
+
+def normalize_title(raw_title):
+    """
+    Returns the canonical form of a title, the way titles are stored:
+    title case without surrounding whitespace.
+    """
+    return raw_title.title().strip()
+
+
+def title_search_key(title):
+    """
+    Returns the search key of a title: casefolded, with accents removed
+    and whitespace collapsed, so 'AMÉLIE ' and 'amelie' get the same key.
+    """
+    folded = title.casefold()
+
+    # Most titles are plain ASCII and have no accents to remove.
+    if not folded.isascii():
+        decomposed = unicodedata.normalize("NFKD", folded)
+        folded = "".join(char for char in decomposed if not unicodedata.combining(char))
+
+    return " ".join(folded.split())
+
+
+class TitleDictionary:
+    """
+    Maps every title of the catalog to a compact integer ID.
+    Titles are interned and each has a search key, so indexes can store
+    IDs instead of strings, and lookups don't have to normalize every
+    title again. The search keys are computed on first use, so exact
+    lookups don't pay for them.
+    """
+
+    def __init__(self, titles=()):
+        # Built in bulk, since this runs over the whole catalog;
+        # the titles must be unique, like the keys of the movies dict.
+        self.titles = [sys.intern(title) for title in titles]
+        self.ids = {title: title_id for title_id, title in enumerate(self.titles)}
+        self._search_keys = None
+        self._ids_by_key = None
+
+    def __len__(self):
+        return len(self.titles)
+
+    def _build_search_keys(self):
+        """
+        Computes the search keys of all titles and groups the IDs by key.
+        """
+        self._search_keys = [title_search_key(title) for title in self.titles]
+        self._ids_by_key = {}
+        for title_id, search_key in enumerate(self._search_keys):
+            self._ids_by_key.setdefault(search_key, []).append(title_id)
+
+    @property
+    def search_keys(self):
+        """
+        The search key of every title, indexed by title ID.
+        """
+        if self._search_keys is None:
+            self._build_search_keys()
+        return self._search_keys
+
+    @property
+    def ids_by_key(self):
+        """
+        A dictionary of search key -> list of title IDs with that key.
+        """
+        if self._ids_by_key is None:
+            self._build_search_keys()
+        return self._ids_by_key
+
+    def add(self, title, search_key=None):
+        """
+        Adds a title (if it isn't there yet) and returns its ID.
+        The search key can be passed in if it was already computed.
+        """
+        title_id = self.ids.get(title)
+        if title_id is not None:
+            return title_id
+
+        title_id = len(self.titles)
+        title = sys.intern(title)
+        self.titles.append(title)
+        self.ids[title] = title_id
+
+        if self._search_keys is not None:
+            if search_key is None:
+                search_key = title_search_key(title)
+            self._search_keys.append(search_key)
+            self._ids_by_key.setdefault(search_key, []).append(title_id)
+
+        return title_id
+
+    def find(self, raw_title):
+        """
+        Returns the ID of a title typed by the user, or None.
+        The canonical title is tried first, then the search key, so
+        differences in case, accents and spacing don't matter.
+        """
+        title_id = self.ids.get(normalize_title(raw_title))
+        if title_id is not None:
+            return title_id
+
+        matching_ids = self.ids_by_key.get(title_search_key(raw_title))
+        return matching_ids[0] if matching_ids else None
+
+    def find_title(self, raw_title):
+        """
+        Returns the stored title matching a title typed by the user, or None.
+        """
+        title_id = self.find(raw_title)
+        return None if title_id is None else self.titles[title_id]
+
+
+def get_catalog_version():
+    """
+    Returns the catalog version: the save counter of this process plus
+    the path, modification time and size of the JSON file. It changes
+    every time movies are added, deleted, updated or imported, also when
+    another process writes the file.
+    """
+    try:
+        stat = os.stat(MOVIE_DB_FILE)
+        file_version = (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        file_version = (None, None)
+
+    return (_catalog_version, MOVIE_DB_FILE) + file_version
+
+
+def get_catalog():
+    """
+    Returns the movies dictionary and its TitleDictionary.
+    Both are loaded once and reused until the catalog version changes,
+    so repeated lookups don't reload the JSON file or rebuild the
+    dictionary. Callers must not modify them.
+    """
+    version = get_catalog_version()
+    if _catalog_cache["version"] != version:
+        movies = get_movies()
+        _catalog_cache["movies"] = movies
+        _catalog_cache["titles"] = TitleDictionary(movies)
+        _catalog_cache["version"] = version
+
+    return _catalog_cache["movies"], _catalog_cache["titles"]
+
+
+def get_cached_catalog():
+    """
+    Returns the movies dictionary and its TitleDictionary if they are
+    already loaded for the current catalog version, otherwise None.
+    Unlike get_catalog this never loads the JSON file.
+    """
+    if _catalog_cache["version"] != get_catalog_version():
+        return None
+
+    return _catalog_cache["movies"], _catalog_cache["titles"]
+
 
 def get_movies():
     """
@@ -22,13 +194,85 @@ def get_movies():
         return {}
 
 
+def iter_movies():
+    """
+    Yields (title, movie_info) pairs from the JSON file one at a time.
+
+    Unlike get_movies the file is read in small pieces and decoded
+    movie by movie, so memory doesn't grow with the size of the database.
+    If the file is not found nothing is yielded.
+    """
+    try:
+        handle = open(MOVIE_DB_FILE, "r")
+    except FileNotFoundError:
+        return
+
+    decoder = json.JSONDecoder()
+    with handle:
+        buffer = ""
+        position = 0
+        started = False
+        title = None
+        while True:
+            # Skip whitespace between tokens.
+            while position < len(buffer) and buffer[position] in " \t\r\n":
+                position += 1
+
+            if position == len(buffer):
+                chunk = handle.read(READ_SIZE)
+                if not chunk:
+                    return
+                buffer, position = chunk, 0
+                continue
+
+            char = buffer[position]
+            if not started:
+                if char != "{":
+                    raise ValueError(f"{MOVIE_DB_FILE} doesn't contain a JSON object.")
+                started = True
+                position += 1
+                continue
+
+            if char == "}" and title is None:
+                return
+
+            if char in ",:":
+                position += 1
+                continue
+
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                value, end = None, len(buffer)
+
+            # The key or value may be cut off at the end of the buffer.
+            if end == len(buffer):
+                chunk = handle.read(READ_SIZE)
+                if not chunk:
+                    raise ValueError(f"{MOVIE_DB_FILE} ends unexpectedly.")
+                buffer, position = buffer[position:] + chunk, 0
+                continue
+
+            position = end
+            if title is None:
+                title = value
+            else:
+                yield title, value
+                title = None
+
+
 def save_movies(movies):
     """
-    Gets all your movies as an argument and saves them to the JSON file.
+    Gets all your movies as an argument and saves them to the JSON file
+    and bumps the catalog version.
     """
+    global _catalog_version
+
     with open(MOVIE_DB_FILE, "w") as handle:
         json.dump(movies, handle, indent=4)
 
+    _catalog_version += 1
+
 
 def add_movie(title, year, rating):
     """
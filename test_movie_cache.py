@@ -0,0 +1,33 @@
+import json
+import movie_cache as mc
+import movie_storage as ms
+
+
+def count_movies():
+    return len(ms.get_movies())
+
+
+def test_cached_result_hits_until_catalog_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(ms, "MOVIE_DB_FILE", str(tmp_path / "movies.json"))
+    mc.clear_cache()
+    ms.save_movies({"Heat": {"rating": 8.3, "year": 1995}})
+
+    assert mc.cached_result("count", (), count_movies) == 1
+    assert mc.cached_result("count", (), count_movies) == 1
+    assert (mc.cache_info()["hits"], mc.cache_info()["misses"]) == (1, 1)
+
+    ms.add_movie("Alien", 1979, 8.5)
+    assert mc.cached_result("count", (), count_movies) == 2
+
+
+def test_cached_result_sees_writes_from_other_processes(tmp_path, monkeypatch):
+    db_file = tmp_path / "movies.json"
+    monkeypatch.setattr(ms, "MOVIE_DB_FILE", str(db_file))
+    mc.clear_cache()
+    ms.save_movies({"Heat": {"rating": 8.3, "year": 1995}})
+    assert mc.cached_result("count", (), count_movies) == 1
+
+    # Written behind movie_storage's back, like movie_import.py in another process.
+    db_file.write_text(json.dumps({"Heat": {"rating": 8.3, "year": 1995}, "Alien": {"rating": 8.5, "year": 1979}}))
+
+    assert mc.cached_result("count", (), count_movies) == 2
@@ -0,0 +1,93 @@
+import csv
+import json
+import pytest
+import movie_export as me
+import movie_storage as ms
+
+
+def make_rows(count):
+    return [(f"Movie {index} Ünïcode", 1900 + index % 125, index % 101 / 10) for index in range(count)]
+
+
+def test_columnar_round_trip_across_row_groups(tmp_path):
+    file_path = str(tmp_path / "movies.mcol")
+    rows = make_rows(25)
+
+    assert me.write_columnar(iter(rows), file_path, row_group_size=4) == 25
+    assert list(me.read_columnar(file_path)) == rows
+
+    with open(file_path, "rb") as handle:
+        assert [count for _, count in me.read_columnar_footer(handle)] == [4, 4, 4, 4, 4, 4, 1]
+
+
+def test_columnar_empty_file(tmp_path):
+    file_path = str(tmp_path / "empty.mcol")
+
+    assert me.write_columnar(iter([]), file_path) == 0
+    assert list(me.read_columnar(file_path)) == []
+
+
+def test_read_columnar_row_matches_read_columnar(tmp_path):
+    file_path = str(tmp_path / "movies.mcol")
+    me.write_columnar(iter(make_rows(10)), file_path, row_group_size=3)
+
+    with open(file_path, "rb") as handle:
+        rows = [
+            me.read_columnar_row(handle, group_offset, count, index)
+            for group_offset, count in me.read_columnar_footer(handle)
+            for index in range(count)
+        ]
+
+    assert rows == list(me.read_columnar(file_path))
+
+
+MOVIES = {
+    "Heat": {"rating": 8.3, "year": 1995},
+    "Alien": {"rating": 8.5, "year": 1979},
+    'The "Room", Director\'s Cut': {"rating": 3.6, "year": 2003},
+    "Se7en": {"rating": 8.3, "year": 1995},
+    "Amélie": {"rating": 8.3, "year": 2001}
+}
+
+
+def test_write_csv_and_jsonl(tmp_path):
+    rows = [(title, movie_info["year"], movie_info["rating"]) for title, movie_info in MOVIES.items()]
+
+    assert me.write_csv(iter(rows), str(tmp_path / "movies.csv")) == 5
+    with open(tmp_path / "movies.csv", newline="", encoding="utf-8") as handle:
+        assert list(csv.reader(handle)) == [["title", "year", "rating"]] + [
+            [title, str(year), str(rating)] for title, year, rating in rows
+        ]
+
+    assert me.write_jsonl(iter(rows), str(tmp_path / "movies.jsonl")) == 5
+    with open(tmp_path / "movies.jsonl", encoding="utf-8") as handle:
+        assert [json.loads(line) for line in handle] == [
+            {"title": title, "year": year, "rating": rating} for title, year, rating in rows
+        ]
+
+
+@pytest.mark.parametrize("run_size", [me.SORT_RUN_SIZE, 2])
+@pytest.mark.parametrize("sort_by, position", [("rating", 2), ("year", 1)])
+def test_export_movies_filters_and_sorts(tmp_path, monkeypatch, run_size, sort_by, position):
+    monkeypatch.setattr(ms, "MOVIE_DB_FILE", str(tmp_path / "movies.json"))
+    monkeypatch.setattr(me, "SORT_RUN_SIZE", run_size)
+    ms.save_movies(MOVIES)
+    file_path = str(tmp_path / "movies.jsonl")
+
+    assert me.export_movies(file_path, minimum_rating=8, start_year=1980, sort_by=sort_by) == 3
+
+    rows = [(title, movie_info["year"], movie_info["rating"]) for title, movie_info in MOVIES.items()
+            if movie_info["rating"] >= 8 and movie_info["year"] >= 1980]
+    expected = sorted(rows, key=lambda row: row[position], reverse=True)
+    with open(file_path, encoding="utf-8") as handle:
+        assert [tuple(json.loads(line).values()) for line in handle] == expected
+
+
+def test_external_sort_spills_runs_stably():
+    rows = [(f"Movie {index}", 1900 + index % 7, index % 5 / 2) for index in range(103)]
+
+    for run_size in (1, 10, 103, 200):
+        assert list(me.external_sort(rows, lambda row: row[2], True, run_size)) == \
+            sorted(rows, key=lambda row: row[2], reverse=True)
+        assert list(me.external_sort(iter(rows), lambda row: row[1], False, run_size)) == \
+            sorted(rows, key=lambda row: row[1])
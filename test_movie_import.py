@@ -0,0 +1,101 @@
+import csv
+import io
+import movie_import as mi
+import movie_storage as ms
+
+
+def test_read_chunks_ends_chunks_at_record_boundaries():
+    lines = [f"Movie {index},2000,7\r\n" for index in range(5000)]
+    # An unquoted stray quote, a multi-line quoted field and escaped quotes.
+    lines[10] = 'Foo "bar,2000,7\r\n'
+    lines[20] = '"Multi\r\n'
+    lines[21] = 'Line ""Quoted"", Part",2001,5\r\n'
+    lines[30] = '"Ends With Quote""",1999,6\r\n'
+    handle = io.StringIO("".join(lines), newline="")
+
+    chunks = list(mi.read_chunks(handle, 100, {"delimiter": ","}))
+
+    assert len(chunks) == 50
+    rows = [row for chunk in chunks for row in csv.reader(chunk)]
+    assert rows == list(csv.reader(lines))
+
+
+def test_read_chunks_ignores_quotes_in_tsv():
+    lines = [f'Movie "{index}\t2000\t7\n' for index in range(300)]
+    handle = io.StringIO("".join(lines), newline="")
+
+    chunks = list(mi.read_chunks(handle, 100, mi.csv_dialect("dump.tsv")))
+
+    assert [len(chunk) for chunk in chunks] == [100, 100, 100]
+
+
+def import_file(tmp_path, monkeypatch, text, existing=None, encoding="utf-8", **options):
+    monkeypatch.setattr(ms, "MOVIE_DB_FILE", str(tmp_path / "movies.json"))
+    if existing is not None:
+        ms.save_movies(existing)
+
+    saves = []
+    save_movies = ms.save_movies
+    monkeypatch.setattr(ms, "save_movies", lambda movies: saves.append(save_movies(movies)))
+
+    file_path = tmp_path / "dump.csv"
+    file_path.write_text(text, encoding=encoding)
+    summary = mi.import_movies(str(file_path), **options)
+    return summary, saves
+
+
+def test_import_movies_normalizes_validates_and_dedups(tmp_path, monkeypatch):
+    text = (
+        "title,year,rating\n"
+        '"  the godfather ",1972,"9,2"\n'
+        "heat,1995,8.3\n"
+        "HEAT,1996,5\n"
+        "AMELIE ,2001,1\n"
+        "too high,2000,11\n"
+        "negative,2000,-1\n"
+        "not a number,2000,nan\n"
+        "bad year,\\N,5\n"
+        "superscript,²,5\n"
+        ",2000,5\n"
+        "short row,2000\n"
+    )
+    existing = {"Amélie": {"rating": 8.3, "year": 2001}}
+
+    summary, saves = import_file(tmp_path, monkeypatch, text, existing, workers=1)
+
+    assert ms.get_movies() == {
+        "Amélie": {"rating": 8.3, "year": 2001},
+        "The Godfather": {"rating": 9.2, "year": 1972},
+        "Heat": {"rating": 8.3, "year": 1995}
+    }
+    assert (summary["rows"], summary["added"], summary["duplicates"], summary["rejected"]) == (11, 2, 2, 7)
+    assert len(saves) == 1
+
+
+def test_import_movies_reads_header_after_byte_order_mark(tmp_path, monkeypatch):
+    summary, _ = import_file(tmp_path, monkeypatch, "title,year,rating\nHeat,1995,8.3\n",
+                             encoding="utf-8-sig", workers=1)
+
+    assert summary["added"] == 1
+    assert ms.get_movies() == {"Heat": {"rating": 8.3, "year": 1995}}
+
+
+def test_import_movies_pool_matches_single_process(tmp_path, monkeypatch):
+    lines = ["title,year,rating\n"]
+    for index in range(500):
+        # Every title comes back a few rows later with other values.
+        lines.append(f"Movie {index % 300},{1900 + index % 120},{index % 11}\n")
+    text = "".join(lines)
+
+    results = []
+    for workers in (1, 3):
+        directory = tmp_path / str(workers)
+        directory.mkdir()
+        summary, saves = import_file(directory, monkeypatch, text, workers=workers, chunk_size=7)
+        del summary["seconds"]
+        results.append((summary, ms.get_movies(), len(saves)))
+
+    assert results[0] == results[1]
+    summary, movies, save_count = results[0]
+    assert (summary["added"], summary["duplicates"], save_count) == (300, 200, 1)
+    assert movies["Movie 0"] == {"rating": 0.0, "year": 1900}
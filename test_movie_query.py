@@ -0,0 +1,119 @@
+import random
+import pytest
+from fuzzywuzzy import process
+import movie_query as mq
+import movie_storage as ms
+
+
+def test_parse_query_bounds_order_and_limit():
+    query = mq.parse_query('rating>=8 year:1990..2000 title~"God Father" order by year desc limit 10')
+
+    assert query.bounds == (("rating", (8.0, True), None), ("year", (1990, True), (2000, True)))
+    assert query.title_fuzzy == "god father"
+    assert (query.order_field, query.order_desc, query.limit) == ("year", True, 10)
+
+
+@pytest.mark.parametrize("expression", ["rating>=nan", "rating<inf", "rating:-inf..5", "rating=NaN"])
+def test_parse_query_rejects_non_finite_ratings(expression):
+    with pytest.raises(ValueError, match="Invalid rating value"):
+        mq.parse_query(expression)
+
+
+def make_catalog():
+    generator = random.Random(7)
+    ratings = [index / 20 for index in range(201)]
+    years = list(range(1850, 2051))
+    generator.shuffle(ratings)
+    generator.shuffle(years)
+    movies = {f"Movie {index}": {"rating": ratings[index], "year": years[index]} for index in range(195)}
+    for index, title in enumerate(["The Godfather", "The Godfather Part Ii", "Amélie", "Heat", "Alien", "Aliens"]):
+        movies[title] = {"rating": ratings[195 + index], "year": years[195 + index]}
+
+    return movies, ms.TitleDictionary(movies)
+
+
+def brute_force(movies, query):
+    results = []
+    for title, movie_info in movies.items():
+        if all(mq._in_bounds(movie_info[field], low, high) for field, low, high in query.bounds):
+            results.append((title, movie_info["year"], movie_info["rating"]))
+
+    if query.order_field is not None:
+        position = {"title": 0, "year": 1, "rating": 2}[query.order_field]
+        results.sort(key=lambda item: item[position], reverse=query.order_desc)
+
+    return results[:query.limit]
+
+
+@pytest.mark.parametrize("expression, access", [
+    ("rating>=7.5", "index_range"),
+    ("rating>=7.5 order by rating desc limit 5", "index_range"),
+    ("rating>2 rating<=9 order by rating limit 4", "index_range"),
+    ("year:1990..1995 rating>=1 order by rating desc limit 3", "index_range"),
+    ("year:1990..1995 rating>=1 order by year desc limit 3", "index_range"),
+    ("rating:4..4.5 year>1900 order by year desc limit 2", "index_range"),
+    ("rating:4..4.5 year>1900 order by rating desc", "index_range"),
+    ("year<1900 order by title", "index_range"),
+    ("year>3000", "index_range"),
+    ("order by year desc limit 7", "full_scan"),
+])
+def test_run_plan_matches_brute_force(expression, access):
+    movies, titles = make_catalog()
+    plan = mq.compile_query(expression)
+
+    assert plan.access == access
+    results = mq.run_plan(plan, movies, mq.build_indexes(movies, titles))
+    expected = brute_force(movies, plan.query)
+    if plan.query.order_field is None:
+        # Unordered results come in index order.
+        results, expected = sorted(results), sorted(expected)
+    assert results == expected
+
+
+def test_run_plan_exact_title():
+    movies, titles = make_catalog()
+    indexes = mq.build_indexes(movies, titles)
+
+    for expression in ('title="  the GODFATHER "', "title:amelie", "title=amélie"):
+        plan = mq.compile_query(expression)
+        assert plan.access == "exact"
+        assert [title for title, _, _ in mq.run_plan(plan, movies, indexes)] == [
+            "The Godfather" if "god" in expression.lower() else "Amélie"
+        ]
+
+    assert mq.run_plan(mq.compile_query("title=Nosferatu"), movies, indexes) == []
+
+
+def test_run_plan_fuzzy_with_and_without_range():
+    movies, titles = make_catalog()
+    indexes = mq.build_indexes(movies, titles)
+    matching = {
+        title for title in movies
+        if process.extractOne("godfather", [ms.title_search_key(title)], score_cutoff=mq.FUZZY_SCORE_CUTOFF)
+    }
+
+    plan = mq.compile_query('title~"GODFATHER"')
+    assert plan.access == "fuzzy"
+    assert {title for title, _, _ in mq.run_plan(plan, movies, indexes)} == matching
+    assert {"The Godfather", "The Godfather Part Ii"} <= matching
+
+    low = min(movies[title]["rating"] for title in matching)
+    plan = mq.compile_query(f'title~godfather rating>{low} order by rating desc')
+    assert plan.access == "index_range"
+    expected = sorted(
+        ((title, movies[title]["year"], movies[title]["rating"]) for title in matching if movies[title]["rating"] > low),
+        key=lambda item: item[2], reverse=True
+    )
+    assert mq.run_plan(plan, movies, indexes) == expected
+
+
+def test_index_range_scans_the_narrowest_index():
+    movies, titles = make_catalog()
+    indexes = mq.build_indexes(movies, titles)
+
+    narrow_year = mq.compile_query("year:1990..1995 rating>=1").query.bounds
+    assert mq._narrowest_range(narrow_year, indexes)[0] == "year"
+
+    narrow_rating = mq.compile_query("rating:4..4.5 year>1900").query.bounds
+    field, start, end = mq._narrowest_range(narrow_rating, indexes)
+    assert (field, end - start) == ("rating", 11)
@@ -0,0 +1,71 @@
+import random
+from collections import Counter
+import pytest
+import movie_export as me
+import movie_sampling as msa
+import movie_storage as ms
+
+
+MOVIES = {
+    "Heat": {"rating": 8.3, "year": 1995},
+    "Alien": {"rating": 8.5, "year": 1979},
+    "The Room": {"rating": 3.6, "year": 2003},
+    "Se7en": {"rating": 8.6, "year": 1995}
+}
+
+
+@pytest.mark.parametrize("loaded", [False, True])
+def test_random_movie_is_uniform_and_current(tmp_path, monkeypatch, loaded):
+    monkeypatch.setattr(ms, "MOVIE_DB_FILE", str(tmp_path / "movies.json"))
+    assert msa.random_movie() is None
+
+    ms.save_movies(MOVIES)
+    if loaded:
+        ms.get_catalog()
+    assert (ms.get_cached_catalog() is not None) == loaded
+
+    generator = random.Random(1)
+    picks = Counter(msa.random_movie(generator)[0] for _ in range(4000))
+    assert set(picks) == set(MOVIES)
+    assert min(picks.values()) > 800
+
+    ms.delete_movie("Heat")
+    assert all(msa.random_movie(generator)[0] != "Heat" for _ in range(200))
+    # Picking a movie doesn't load the catalog.
+    assert ms.get_cached_catalog() is None
+
+
+def test_sample_movies_filters_without_replacement(tmp_path, monkeypatch):
+    monkeypatch.setattr(ms, "MOVIE_DB_FILE", str(tmp_path / "movies.json"))
+    ms.save_movies(MOVIES)
+
+    sample = msa.sample_movies(5, minimum_rating=8, start_year=1990, end_year=1999)
+    assert sorted(title for title, _, _ in sample) == ["Heat", "Se7en"]
+
+
+def test_weighted_reservoir_sample_follows_ratings():
+    rows = [("Zero", 2000, 0.0), ("One", 2000, 1.0), ("Three", 2000, 3.0), ("Six", 2000, 6.0)]
+    generator = random.Random(3)
+
+    picks = Counter(msa.weighted_reservoir_sample(rows, 1, generator)[0][0] for _ in range(10000))
+    assert "Zero" not in picks
+    for title, share in (("One", 0.1), ("Three", 0.3), ("Six", 0.6)):
+        assert abs(picks[title] / 10000 - share) < 0.02
+
+    assert [row[0] for row in msa.weighted_reservoir_sample(rows, 10, generator)].count("Zero") == 0
+    assert msa.weighted_reservoir_sample(rows, 0, generator) == []
+
+
+def test_sample_columnar_picks_distinct_rows(tmp_path):
+    file_path = str(tmp_path / "movies.mcol")
+    rows = [(f"Movie {index}", 1900 + index, index % 101 / 10) for index in range(50)]
+    me.write_columnar(iter(rows), file_path, row_group_size=7)
+    generator = random.Random(5)
+
+    sample = msa.sample_columnar(file_path, 20, generator)
+    assert len(sample) == 20
+    assert len(set(sample)) == 20
+    assert set(sample) <= set(rows)
+
+    assert sorted(msa.sample_columnar(file_path, 80, generator)) == sorted(rows)
+    assert msa.sample_columnar(file_path, 0, generator) == []
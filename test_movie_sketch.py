@@ -0,0 +1,29 @@
+import random
+import movie_sketch as sk
+
+
+def test_quantile_sketch_rank_error_on_continuous_values():
+    random.seed(7)
+    error = 0.02
+    values = [random.gauss(6.3, 1.4) for _ in range(50000)]
+    sketch = sk.QuantileSketch(error)
+    for value in values:
+        sketch.add(value)
+
+    sorted_values = sorted(values)
+    for fraction, estimate in zip(sk.PERCENTILES, sketch.quantiles(sk.PERCENTILES)):
+        rank = sorted_values.index(estimate) / len(values)
+        assert abs(rank - fraction) <= 2 * error
+
+    # The sketch keeps far fewer values than it has seen.
+    assert sum(len(compactor) for compactor in sketch.compactors) < len(values) / 20
+
+
+def test_hyperloglog_estimate_is_within_error():
+    error = 0.02
+    counter = sk.HyperLogLog(error)
+    for value in range(20000):
+        counter.add(value)
+        counter.add(value)
+
+    assert abs(counter.estimate() - 20000) / 20000 <= 3 * error
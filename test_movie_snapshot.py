@@ -0,0 +1,69 @@
+import os
+import shutil
+import pytest
+import movie_snapshot as msn
+import movie_storage as ms
+
+
+MOVIES = {f"Movie {index}": {"rating": index % 101 / 10, "year": 1900 + index % 125} for index in range(300)}
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(ms, "MOVIE_DB_FILE", str(tmp_path / "movies.json"))
+    monkeypatch.setattr(msn, "SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    ms.save_movies(MOVIES)
+    return tmp_path
+
+
+def take_changed_snapshots(directory):
+    old_manifest = msn.create_snapshot("old", bucket_count=64)
+    shutil.copy(ms.MOVIE_DB_FILE, directory / "original.json")
+
+    ms.update_movie("Movie 1", 9.9)
+    ms.delete_movie("Movie 2")
+    ms.add_movie("Amélie", 2001, 8.3)
+    new_manifest = msn.create_snapshot("new", bucket_count=64)
+    return old_manifest, new_manifest
+
+
+def test_delta_round_trip(snapshot_dir, monkeypatch):
+    old_manifest, new_manifest = take_changed_snapshots(snapshot_dir)
+    changed_movies = ms.get_movies()
+
+    delta_file = str(snapshot_dir / "delta.json")
+    msn.write_delta(msn.diff_snapshots(msn.load_snapshot("old"), msn.load_snapshot("new")), delta_file)
+    delta = msn.read_delta(delta_file)
+    assert 1 <= len(delta["changes"]) <= 3
+
+    monkeypatch.setattr(ms, "MOVIE_DB_FILE", str(snapshot_dir / "original.json"))
+    assert msn.apply_delta(delta) == len(delta["changes"])
+    assert ms.get_movies() == changed_movies
+
+
+def test_unchanged_catalog_gives_empty_delta(snapshot_dir):
+    first = msn.create_snapshot(bucket_count=64)
+    second = msn.create_snapshot(bucket_count=64)
+
+    # Snapshots taken in the same second get distinct names.
+    assert first["name"] != second["name"]
+    assert msn.load_snapshot(first["name"]) == first
+    assert msn.diff_snapshots(first, second)["changes"] == {}
+    assert not [name for name in os.listdir(os.path.join(msn.SNAPSHOT_DIR, "blocks")) if name.endswith(".tmp")]
+
+
+def test_apply_delta_rejects_diverged_copy_and_corrupted_blocks(snapshot_dir, monkeypatch):
+    old_manifest, new_manifest = take_changed_snapshots(snapshot_dir)
+    delta = msn.diff_snapshots(old_manifest, new_manifest)
+
+    # The database already holds the new movies, not the delta base.
+    with pytest.raises(ValueError, match="Local copy doesn't match the delta base"):
+        msn.apply_delta(delta)
+
+    monkeypatch.setattr(ms, "MOVIE_DB_FILE", str(snapshot_dir / "original.json"))
+    change = next(change for change in delta["changes"].values() if change["records"])
+    change["records"][0][2] = 11.0
+    with pytest.raises(ValueError, match="corrupted"):
+        msn.apply_delta(delta)
+
+    assert ms.get_movies() == MOVIES
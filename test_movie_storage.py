@@ -0,0 +1,62 @@
+import json
+import movie_storage as ms
+
+
+TRICKY_MOVIES = {
+    "The Godfather": {"rating": 9.2, "year": 1972},
+    'Braces {}, Quotes " And Colons: Part II': {"rating": 7.5, "year": 2001},
+    "Back\\Slash, Comma": {"rating": 0.0, "year": 1999},
+    "Amélie": {"rating": 8.3, "year": 2001},
+    "}": {"rating": 10.0, "year": 2024},
+    "": {"rating": 5.0, "year": 1900}
+}
+
+
+def test_iter_movies_matches_get_movies(tmp_path, monkeypatch):
+    monkeypatch.setattr(ms, "MOVIE_DB_FILE", str(tmp_path / "movies.json"))
+    monkeypatch.setattr(ms, "READ_SIZE", 3)
+    ms.save_movies(TRICKY_MOVIES)
+
+    assert list(ms.iter_movies()) == list(ms.get_movies().items())
+
+
+def test_iter_movies_reads_compact_json(tmp_path, monkeypatch):
+    db_file = tmp_path / "movies.json"
+    db_file.write_text(json.dumps(TRICKY_MOVIES, separators=(",", ":")))
+    monkeypatch.setattr(ms, "MOVIE_DB_FILE", str(db_file))
+    monkeypatch.setattr(ms, "READ_SIZE", 1)
+
+    assert dict(ms.iter_movies()) == TRICKY_MOVIES
+
+
+def test_iter_movies_missing_and_empty_file(tmp_path, monkeypatch):
+    db_file = tmp_path / "movies.json"
+    monkeypatch.setattr(ms, "MOVIE_DB_FILE", str(db_file))
+    assert list(ms.iter_movies()) == []
+
+    db_file.write_text("{}")
+    assert list(ms.iter_movies()) == []
+
+
+def test_title_dictionary_finds_titles_ignoring_case_accents_and_spacing():
+    titles = ms.TitleDictionary(["The Godfather: Part II", "Amélie"])
+    titles.add("Heat")
+
+    assert titles.find_title("the godfather: part ii") == "The Godfather: Part II"
+    assert titles.find_title("  AMELIE ") == "Amélie"
+    assert titles.find_title("heat") == "Heat"
+    assert titles.find_title("Alien") is None
+    assert titles.search_keys == ["the godfather: part ii", "amelie", "heat"]
+
+
+def test_get_catalog_is_reused_until_the_catalog_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(ms, "MOVIE_DB_FILE", str(tmp_path / "movies.json"))
+    ms.save_movies({"Heat": {"rating": 8.3, "year": 1995}})
+
+    movies, titles = ms.get_catalog()
+    assert ms.get_catalog()[1] is titles
+
+    ms.add_movie("Alien", 1979, 8.5)
+    movies, new_titles = ms.get_catalog()
+    assert new_titles is not titles
+    assert new_titles.find_title("alien") == "Alien"